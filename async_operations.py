@@ -0,0 +1,231 @@
+'''Multiply and divide without holding up an event loop
+A multiply of huge numbers, or a divide to tens of thousands of decimal places, can take seconds -
+and in a coroutine that's seconds where nothing else gets to run. amultiply / adivide give the same
+answers as operations.multiply / divide, but either:
+
+  - work through the calculation in steps, handing control back to the event loop after each one
+    (the default). Cancelling the task, or running out of `timeout`, stops it at the next step, and
+    `progress(done, total)` is called after every step.
+  - or, given an `executor`, run the whole calculation there. A ProcessPoolExecutor uses other
+    cores, a ThreadPoolExecutor at least keeps the event loop responsive. Cancelling or timing out
+    stops the wait, but the calculation already handed over runs to the end in the background.
+
+    answer = await adivide("1", "7", 50_000, timeout=10, progress=print)
+'''
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor
+
+import operations
+from context import Context
+from limbs import (
+    BASE_DIGITS,
+    KARATSUBA_THRESHOLD,
+    TOOM3_THRESHOLD,
+    _add,
+    _add_at,
+    _divmod,
+    _karatsuba_combine,
+    _multiply,
+    _square,
+    _toom3_combine,
+    _toom3_points,
+    _trim,
+)
+from number import Number, _division_operands, _division_result, _without_zero_limbs, to_number
+from operations import _context, _divide_decimals
+
+
+# Roughly how many digits to work through between handing control back to the event loop - for
+# multiply, pieces of about this many digits by this many
+YIELD_EVERY = 10_000
+
+Progress = Callable[[int, int], None]
+
+
+async def amultiply(
+    number1: str | Number,
+    number2: str | Number,
+    context: Context | None = None,
+    *,
+    executor: Executor | None = None,
+    timeout: float | None = None,
+    progress: Progress | None = None,
+    yield_every: int = YIELD_EVERY,
+) -> str:
+    context = _context(context)
+    if executor is not None:
+        return await _offload(executor, timeout, progress, operations.multiply, str(number1), str(number2), context)
+    if isinstance(number1, str) and number1 == number2:
+        # the same number twice - parse it once, so it's multiplied as a square (see multiply)
+        number1 = number2 = to_number(number1)
+    return await asyncio.wait_for(
+        _multiply_steps(to_number(number1), to_number(number2), context, progress, yield_every), timeout,
+    )
+
+
+async def adivide(
+    number1: str | Number,
+    number2: str | Number,
+    max_decimals: int = 10,
+    context: Context | None = None,
+    *,
+    executor: Executor | None = None,
+    timeout: float | None = None,
+    progress: Progress | None = None,
+    yield_every: int = YIELD_EVERY,
+) -> str:
+    context = _context(context)
+    if executor is not None:
+        return await _offload(
+            executor, timeout, progress, operations.divide, str(number1), str(number2), max_decimals, context,
+        )
+    return await asyncio.wait_for(
+        _divide_steps(to_number(number1), to_number(number2), max_decimals, context, progress, yield_every), timeout,
+    )
+
+
+async def _offload(executor: Executor, timeout: float | None, progress: Progress | None, function, *args) -> str:
+    # the arguments are strings and a Context, so this works with process pools too. The context
+    # is passed explicitly as other threads / processes don't see this one's current context.
+    result = await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(executor, function, *args), timeout)
+    if progress is not None:
+        progress(1, 1)
+    return result
+
+
+async def _multiply_steps(
+    number1: Number,
+    number2: Number,
+    context: Context,
+    progress: Progress | None,
+    yield_every: int,
+) -> str:
+    # the same multiplication as Number * Number, split up the same way (Karatsuba / Toom-3), so
+    # it's no more work - just with a break after each piece of about yield_every digits squared
+    square = number1.limbs is number2.limbs and number1.exponent == number2.exponent
+    stripped1, stripped2 = _without_zero_limbs(number1), _without_zero_limbs(number2)
+    a, b = stripped1.limbs, stripped2.limbs
+    steps = _Steps(progress, len(a) * len(b), _step_limbs(yield_every) ** 2)
+    limbs = await _product(a, None if square else b, steps.total, steps)
+    if steps.pending:
+        await _step_done(progress, steps.total, steps.total)
+
+    product = Number(number1.sign * number2.sign, limbs, stripped1.exponent + stripped2.exponent)
+    return str(product.normalized().rounded(context.precision, context.rounding))
+
+
+class _Steps:
+    # how much of the multiplication is done, out of `total`, and how many limb products since the
+    # last break - there's a break once that reaches `budget`
+    __slots__ = ('progress', 'total', 'budget', 'done', 'pending')
+
+    def __init__(self, progress: Progress | None, total: int, budget: int):
+        self.progress = progress
+        self.total = total
+        self.budget = budget
+        self.done = 0
+        self.pending = 0
+
+    async def add(self, share: int, work: int) -> None:
+        self.done += share
+        self.pending += work
+        if self.pending >= self.budget:
+            self.pending = 0
+            await _step_done(self.progress, self.done, self.total)
+
+
+async def _product(a: list[int], b: list[int] | None, share: int, steps: _Steps) -> list[int]:
+    # limbs._multiply(a, b) - or limbs._square(a) when b is None - taking the same branches, until
+    # the pieces are small enough to do in one go. `share` is this piece's part of steps.total.
+    if b is not None and len(a) < len(b):
+        a, b = b, a
+    shorter = len(a) if b is None else len(b)
+    if len(a) * shorter <= steps.budget or (shorter < KARATSUBA_THRESHOLD and len(a) < 2 * shorter):
+        product = _square(a) if b is None else _multiply(a, b)
+        await steps.add(share, len(a) * shorter)
+        return product
+
+    if b is not None and (len(b) < KARATSUBA_THRESHOLD or len(a) >= 2 * len(b)):
+        # as _multiply_unbalanced: b by b-sized pieces of a
+        offsets = range(0, len(a), len(b))
+        pieces = [(_trim(a[offset:offset + len(b)]), b) for offset in offsets]
+        output = [0] * (len(a) + len(b))
+        for offset, piece in zip(offsets, await _products(pieces, share, steps)):
+            _add_at(output, piece, offset)
+        return _trim(output)
+
+    length = len(a) + (len(a) if b is None else len(b))
+    if shorter < TOOM3_THRESHOLD:
+        half = len(a) // 2
+        a0, a1 = _trim(a[:half]), a[half:]
+        if b is None:
+            pieces = [(a0, None), (a1, None), (_add(a0, a1), None)]
+        else:
+            b0, b1 = _trim(b[:half]), _trim(b[half:])
+            pieces = [(a0, b0), (a1, b1), (_add(a0, a1), _add(b0, b1))]
+        low, high, cross = await _products(pieces, share, steps)
+        return _karatsuba_combine(low, cross, high, half, length)
+
+    third = (len(a) + 2) // 3
+    points1 = _toom3_points(a, third)
+    points2 = points1 if b is None else _toom3_points(b, third)
+    pieces = [(x[1], None if b is None else y[1]) for x, y in zip(points1, points2)]
+    values = await _products(pieces, share, steps)
+    return _toom3_combine([(x[0] * y[0], value) for x, y, value in zip(points1, points2, values)], third, length)
+
+
+async def _products(pieces: list[tuple[list[int], list[int] | None]], share: int, steps: _Steps) -> list[list[int]]:
+    # each pair multiplied in turn, sharing out `share` between them
+    part = share // len(pieces)
+    shares = [part] * (len(pieces) - 1) + [share - part * (len(pieces) - 1)]
+    return [await _product(a, b, piece_share, steps) for (a, b), piece_share in zip(pieces, shares)]
+
+
+async def _divide_steps(
+    dividend: Number,
+    divisor: Number,
+    max_decimals: int,
+    context: Context,
+    progress: Progress | None,
+    yield_every: int,
+) -> str:
+    # long division by pieces: bring down a piece of the numerator at a time, divide, and carry the
+    # remainder on to the next piece. Each piece of the quotient is less than BASE ** step, because
+    # the remainder carried in is always less than the divisor.
+    if divisor.is_zero():
+        raise ZeroDivisionError()
+    if dividend.is_zero():
+        return '0'
+
+    decimals = _divide_decimals(dividend, divisor, max_decimals)
+    numerator, denominator, shifted = _division_operands(
+        dividend, divisor, decimals, context.rounding, context.precision,
+    )
+    step = _step_limbs(yield_every)
+    quotient = [0] * len(numerator)
+    remainder = []
+    for end in range(len(numerator), 0, -step):
+        start = max(end - step, 0)
+        current = _trim(numerator[start:end])
+        if remainder:
+            current = current + [0] * (end - start - len(current)) + remainder
+        piece, remainder = _divmod(current, denominator)
+        quotient[start:start + len(piece)] = piece
+        await _step_done(progress, len(numerator) - start, len(numerator))
+
+    sign = dividend.sign * divisor.sign
+    return str(_division_result(sign, _trim(quotient), remainder, decimals, shifted, context.rounding, context.precision))
+
+
+def _step_limbs(yield_every: int) -> int:
+    if yield_every < 1:
+        raise ValueError(f"yield_every must be at least 1 digit, not {yield_every}")
+    return -(-yield_every // BASE_DIGITS)
+
+
+async def _step_done(progress: Progress | None, done: int, total: int) -> None:
+    if progress is not None:
+        progress(done, total)
+    await asyncio.sleep(0)
@@ -0,0 +1,302 @@
+'''Benchmarks for the operations
+Times add / subtract / multiply / divide (and the string helpers in utils.py) over operands from 1
+to 100k digits, plus the pi.py Monte Carlo loop end-to-end, how multiply_parallel scales from 1
+to N processes and what amultiply / adivide cost on top of multiply / divide. Results can be saved
+as JSON and compared against a previous run, e.g.
+
+    python bench.py --output before.json
+    ... make changes ...
+    python bench.py --output after.json --compare before.json
+'''
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Callable
+
+from async_operations import adivide, amultiply
+import operations
+from parallel import multiply_parallel
+import pi
+import schoolbook
+from utils import _align_numbers, _clean_number, _lte
+
+
+SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+CHAIN_DIGITS = 100_000
+PARALLEL_DIGITS = 200_000
+ASYNC_DIGITS = 100_000
+VARIANTS = ('integer', 'decimal', 'negative')
+
+BENCHMARKS: dict[str, Callable[[str, str], object]] = {
+    'add': operations.add,
+    'subtract': operations.subtract,
+    'multiply': operations.multiply,
+    'divide': lambda number1, number2: operations.divide(number1, number2, max_decimals=len(number1)),
+    '_align_numbers': _align_numbers,
+    '_clean_number': lambda number1, number2: _clean_number(number1),
+    '_lte': _lte,
+}
+
+
+def make_number(rng: random.Random, digits: int, variant: str) -> str:
+    # a random number with `digits` digits, never starting with a zero
+    value = str(rng.randint(1, 9)) + ''.join(rng.choice('0123456789') for _ in range(digits - 1))
+    if variant == 'decimal' and digits > 1:
+        # split the digits roughly evenly between the integer and decimal parts
+        middle = (digits + 1) // 2
+        value = f'{value[:middle]}.{value[middle:]}'
+    elif variant == 'negative':
+        value = f'-{value}'
+    return value
+
+
+def time_call(func: Callable, args: tuple, min_time: float) -> float:
+    # seconds per call - repeat until at least min_time has passed, so quick calls average out
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func(*args)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def peak_memory(func: Callable, args: tuple) -> int:
+    # bytes allocated at the high-water mark of a single call
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def scaling_exponent(points: list[tuple[int, float]]) -> float | None:
+    # least-squares slope of log(time) against log(digits): ~1 is linear, ~2 is quadratic.
+    # Small sizes are dominated by call overhead, so only use them if there's nothing else.
+    large = [(digits, seconds) for digits, seconds in points if digits >= 1_000]
+    if len(large) >= 2:
+        points = large
+    if len(points) < 2:
+        return None
+
+    xs = [math.log(digits) for digits, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    denominator = sum((x - x_mean) ** 2 for x in xs)
+    if not denominator:
+        return None
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / denominator
+
+
+def run_operations(names: list[str], sizes: list[int], variants: list[str], min_time: float, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    results = []
+    for variant in variants:
+        for digits in sizes:
+            args = (make_number(rng, digits, variant), make_number(rng, digits, 'decimal' if variant == 'decimal' else 'integer'))
+            for name in names:
+                seconds = time_call(BENCHMARKS[name], args, min_time)
+                result = {
+                    'operation': name,
+                    'variant': variant,
+                    'digits': digits,
+                    'seconds': seconds,
+                    'ops_per_sec': 1 / seconds,
+                    'peak_bytes': peak_memory(BENCHMARKS[name], args),
+                }
+                results.append(result)
+                print(f"{name:>15} {variant:>9} {digits:>7} digits: {result['ops_per_sec']:>14,.1f} ops/sec, peak {result['peak_bytes']:>12,} bytes")
+    return results
+
+
+def chain_cases(digits: int) -> dict[str, tuple[str, str, str]]:
+    # worst cases for carrying / borrowing - a single carry or borrow that runs the whole length
+    return {
+        'carry': ('add', '9' * digits, '1'),
+        'borrow': ('subtract', f"1{'0' * digits}", '1'),
+        'decimal carry': ('add', f"{'9' * (digits // 2)}.{'9' * (digits // 2)}", f"0.{'0' * (digits // 2 - 1)}1"),
+        'decimal borrow': ('subtract', f"1{'0' * (digits // 2)}.{'0' * (digits // 2)}", f"0.{'0' * (digits // 2 - 1)}1"),
+    }
+
+
+def run_chains(digits: int, min_time: float) -> list[dict]:
+    # carry / borrow chains through both implementations - these used to be quadratic in schoolbook.py
+    results = []
+    for name, (operation, number1, number2) in chain_cases(digits).items():
+        for module in (operations, schoolbook):
+            seconds = time_call(getattr(module, operation), (number1, number2), min_time)
+            results.append({'chain': name, 'module': module.__name__, 'digits': digits, 'seconds': seconds})
+            print(f"{name:>15} {module.__name__:>10} {digits:>7} digits: {seconds * 1000:>10.2f} ms")
+    return results
+
+
+def summarise_scaling(results: list[dict]) -> dict[str, float | None]:
+    points: dict[str, list[tuple[int, float]]] = {}
+    for result in results:
+        points.setdefault(f"{result['operation']}/{result['variant']}", []).append((result['digits'], result['seconds']))
+    return {key: scaling_exponent(values) for key, values in points.items()}
+
+
+def run_pi(iterations: int, seed: int, fast: bool = False) -> dict:
+    # the Monte Carlo workload from pi.py, in a single process
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        pi.run_batch(iterations, seed=seed, fast=fast)
+        seconds = time.perf_counter() - start
+    return {'iterations': iterations, 'seconds': seconds, 'iterations_per_sec': iterations / seconds}
+
+
+def run_parallel(digits: int, max_workers: int, seed: int) -> list[dict]:
+    # one multiply_parallel on 1, 2, 4, ... max_workers processes. Each pool is started before the
+    # clock starts, as it would be if it were shared between calls.
+    rng = random.Random(seed)
+    number1, number2 = make_number(rng, digits, 'integer'), make_number(rng, digits, 'integer')
+    counts = sorted({1, max_workers, *(2 ** power for power in range(1, max_workers.bit_length()))})
+    results = []
+    for workers in counts:
+        with ProcessPoolExecutor(workers) as executor:
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            multiply_parallel(number1, number2, workers, executor=executor)
+            seconds = time.perf_counter() - start
+        speedup = results[0]['seconds'] / seconds if results else 1.0
+        results.append({'workers': workers, 'digits': digits, 'seconds': seconds, 'speedup': speedup})
+        print(f"{workers:>3} workers {digits:>9} digits: {seconds:>8.2f} s, {speedup:>5.2f}x")
+    return results
+
+
+def run_async(digits: int, seed: int) -> list[dict]:
+    # amultiply / adivide stepping through on the event loop, against multiply / divide in one go
+    rng = random.Random(seed)
+    number1, number2 = make_number(rng, digits, 'integer'), make_number(rng, digits, 'integer')
+    cases = {
+        'multiply': (operations.multiply, amultiply, (number1, number2)),
+        'divide': (operations.divide, adivide, (number1, number2[:digits // 2], digits)),
+    }
+    results = []
+    for name, (function, coroutine, args) in cases.items():
+        start = time.perf_counter()
+        function(*args)
+        sync_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        asyncio.run(coroutine(*args))
+        seconds = time.perf_counter() - start
+        results.append({
+            'operation': name, 'digits': digits, 'seconds': seconds, 'sync_seconds': sync_seconds,
+            'overhead': seconds / sync_seconds,
+        })
+        print(f"{name:>15} {digits:>9} digits: {seconds:>8.2f} s, {seconds / sync_seconds:>5.2f}x the time of {name}()")
+    return results
+
+
+def compare(results: dict, baseline: dict) -> None:
+    # speed-up of each benchmark relative to a previous run (> 1 is faster now)
+    previous = {(r['operation'], r['variant'], r['digits']): r['seconds'] for r in baseline.get('operations', [])}
+    print('\nCompared with baseline:')
+    for result in results['operations']:
+        key = (result['operation'], result['variant'], result['digits'])
+        if key in previous:
+            print(f"{key[0]:>15} {key[1]:>9} {key[2]:>7} digits: {previous[key] / result['seconds']:>7.2f}x")
+    previous = {(r['chain'], r['module'], r['digits']): r['seconds'] for r in baseline.get('chains', [])}
+    for result in results.get('chains', []):
+        key = (result['chain'], result['module'], result['digits'])
+        if key in previous:
+            print(f"{key[0]:>15} {key[1]:>9} {key[2]:>7} digits: {previous[key] / result['seconds']:>7.2f}x")
+    previous = {(r['workers'], r['digits']): r['seconds'] for r in baseline.get('parallel', [])}
+    for result in results.get('parallel', []):
+        key = (result['workers'], result['digits'])
+        if key in previous:
+            print(f"{'multiply':>15} {f'{key[0]} workers':>9} {key[1]:>7} digits: {previous[key] / result['seconds']:>7.2f}x")
+    previous = {(r['operation'], r['digits']): r['seconds'] for r in baseline.get('async', [])}
+    for result in results.get('async', []):
+        key = (result['operation'], result['digits'])
+        if key in previous:
+            print(f"{f'a{key[0]}':>15} {'':>9} {key[1]:>7} digits: {previous[key] / result['seconds']:>7.2f}x")
+    for key, name in (('pi', 'pi.py'), ('pi_fast', 'pi.py --fast')):
+        if key in results and key in baseline:
+            print(f"{name:>15} {'':>9} {'':>7}        : {baseline[key]['seconds'] / results[key]['seconds']:>7.2f}x")
+
+
+def _commit() -> str | None:
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark the arithmetic operations")
+    parser.add_argument('--operations', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), help="operand lengths, in digits")
+    parser.add_argument('--max-digits', type=int, default=None, help="skip sizes above this")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds to spend on each benchmark")
+    parser.add_argument('--chain-digits', type=int, default=CHAIN_DIGITS, help="length of the carry / borrow chains, 0 to skip")
+    parser.add_argument('--pi-iterations', type=int, default=20_000, help="0 to skip the pi.py benchmark")
+    parser.add_argument('--parallel-digits', type=int, default=PARALLEL_DIGITS, help="operand length for multiply_parallel, 0 to skip")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="most processes for multiply_parallel")
+    parser.add_argument('--async-digits', type=int, default=ASYNC_DIGITS, help="operand length for amultiply / adivide, 0 to skip")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="save the results to this JSON file")
+    parser.add_argument('--compare', help="a JSON file from a previous run to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in args.sizes if args.max_digits is None or size <= args.max_digits]
+    results = {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'operations': run_operations(args.operations, sizes, args.variants, args.min_time, args.seed),
+    }
+
+    results['scaling'] = summarise_scaling(results['operations'])
+    print('\nScaling exponents (time ~ digits ^ exponent):')
+    for key, exponent in results['scaling'].items():
+        print(f"{key:>25}: {'n/a' if exponent is None else f'{exponent:.2f}'}")
+
+    if args.chain_digits:
+        print('\nCarry / borrow chains:')
+        results['chains'] = run_chains(args.chain_digits, args.min_time)
+
+    if args.pi_iterations:
+        results['pi'] = run_pi(args.pi_iterations, args.seed)
+        results['pi_fast'] = run_pi(args.pi_iterations, args.seed, fast=True)
+        print(f"\npi.py: {results['pi']['iterations_per_sec']:,.0f} iterations/sec")
+        print(f"pi.py --fast: {results['pi_fast']['iterations_per_sec']:,.0f} iterations/sec")
+
+    if args.parallel_digits:
+        print('\nmultiply_parallel:')
+        results['parallel'] = run_parallel(args.parallel_digits, args.workers, args.seed)
+
+    if args.async_digits:
+        print('\namultiply / adivide:')
+        results['async'] = run_async(args.async_digits, args.seed)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
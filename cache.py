@@ -0,0 +1,61 @@
+'''Least-recently-used cache for repeated calculations
+Off by default (maxsize 0). Turn it on with resize(), e.g. operations.enable_cache(1024), when the
+same calculations come up again and again - like dividing lots of numbers by the same few divisors.
+Once it's full, the entry that was used longest ago makes way for the new one.
+'''
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import NamedTuple
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class LRUCache:
+    __slots__ = ('maxsize', '_entries', '_hits', '_misses', '_evictions')
+
+    def __init__(self, maxsize: int = 0):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._hits = self._misses = self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, compute: Callable[[], object]) -> object:
+        # the cached value for key, or compute() it and remember it for next time
+        if key in self._entries:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self._misses += 1
+        value = compute()
+        if self.maxsize > 0:
+            self._entries[key] = value
+            self._evict()
+        return value
+
+    def resize(self, maxsize: int) -> None:
+        # 0 turns the cache off
+        self.maxsize = maxsize
+        self._evict()
+
+    def clear(self) -> None:
+        # forget every entry and reset the counters
+        self._entries.clear()
+        self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self.maxsize)
+
+    def _evict(self) -> None:
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+            self._evictions += 1
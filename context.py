@@ -0,0 +1,68 @@
+'''How many digits to keep, and how to round
+By default nothing is rounded - add / subtract / multiply keep every digit and divide truncates at
+max_decimals, exactly as before. A Context with a precision rounds every answer to that many
+significant digits, so a long chain of calculations stays the same size rather than growing with
+each step:
+
+    with local_context(precision=20, rounding=HALF_EVEN):
+        multiply("1.23456789", "9.87654321")  # at most 20 significant digits
+
+The current context is kept in a ContextVar, so each thread (and each asyncio task) has its own.
+Every operation also takes a context= argument to override it for one call.
+'''
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple
+
+from number import CEILING, FLOOR, HALF_EVEN, HALF_UP, ROUNDINGS, TRUNCATE
+
+
+__all__ = [
+    'CEILING',
+    'Context',
+    'FLOOR',
+    'HALF_EVEN',
+    'HALF_UP',
+    'ROUNDINGS',
+    'TRUNCATE',
+    'get_context',
+    'local_context',
+    'set_context',
+]
+
+
+class Context(NamedTuple):
+    precision: int | None = None  # significant digits to keep - None keeps them all
+    rounding: str = TRUNCATE  # also used where divide stops at max_decimals
+
+
+_current: ContextVar[Context] = ContextVar('context', default=Context())
+
+
+def get_context() -> Context:
+    return _current.get()
+
+
+def set_context(context: Context) -> None:
+    _current.set(_checked(context))
+
+
+@contextmanager
+def local_context(context: Context | None = None, **changes) -> Iterator[Context]:
+    # the current context (or `context`) with `changes`, for the duration of the with block
+    context = _checked((context or get_context())._replace(**changes))
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def _checked(context: Context) -> Context:
+    if context.precision is not None and context.precision < 1:
+        raise ValueError(f"Precision must be at least 1 significant digit, not {context.precision}")
+    if context.rounding not in ROUNDINGS:
+        raise ValueError(f"Unknown rounding {context.rounding!r}, expected one of {', '.join(ROUNDINGS)}")
+    return context
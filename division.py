@@ -0,0 +1,169 @@
+'''Long division, one digit at a time
+divide() works out every digit before returning anything. This does the same long division but hands
+each digit over as soon as it's known, only ever holding on to the current remainder - so the caller
+can stop whenever they like, and save the state to carry on from later.
+'''
+
+from typing import NamedTuple
+
+from cache import LRUCache
+from limbs import (
+    _add,
+    _compare,
+    _from_digits,
+    _multiply_small,
+    _subtract,
+    _to_digits,
+)
+from number import Number
+from utils import _bracket_period
+
+
+# multiples tables by divisor, when turned on with operations.enable_cache(). The tables are only
+# ever read, so iterators with the same divisor can share one.
+multiples_cache = LRUCache()
+
+
+class DivisionState(NamedTuple):
+    # everything needed to carry on a long division - plain strings / ints so it's easy to save
+    remainder: str
+    divisor: str
+    digits: str  # digits of the dividend still to be brought down
+    integer_digits: int  # how many of those are before the decimal point
+    started: bool = False  # have we got past the leading zeroes of the quotient?
+    point: bool = False  # have we output the decimal point?
+    negative: bool = False  # do we still need to output a minus sign?
+
+
+class DivisionDigits:
+    # iterator over the characters of a quotient: '-', digits and '.'
+    __slots__ = ('_remainder', '_divisor', '_multiples', '_digits', '_position', '_integer_end', '_started', '_point', '_negative')
+
+    def __init__(self, state: DivisionState):
+        self._remainder = _from_digits(state.remainder)
+        self._divisor = state.divisor
+        divisor = _from_digits(state.divisor)
+        if not divisor:
+            raise ZeroDivisionError()
+        # the multiples of the divisor, 0-9 - one of these fits each step
+        if multiples_cache.maxsize:
+            self._multiples = multiples_cache.get(state.divisor, lambda: _multiples(divisor))
+        else:
+            self._multiples = _multiples(divisor)
+        self._digits = state.digits
+        self._position = 0
+        self._integer_end = state.integer_digits
+        self._started = state.started
+        self._point = state.point
+        self._negative = state.negative
+
+    @classmethod
+    def start(cls, number1: Number, number2: Number) -> 'DivisionDigits':
+        if number2.is_zero():
+            raise ZeroDivisionError()
+
+        # a / b with both as integers: A x 10^e1 / B x 10^e2 = (A x 10^(e1 - e2)) / B
+        digits = _to_digits(number1.limbs)
+        shift = number1.exponent - number2.exponent
+        if shift >= 0:
+            digits, decimals = f"{digits}{'0' * shift}", 0
+        else:
+            decimals = -shift
+            digits = digits.rjust(decimals + 1, '0')
+
+        # trailing zeroes after the decimal point don't change the answer
+        stripped = digits[:len(digits) - decimals] + digits[len(digits) - decimals:].rstrip('0')
+        state = DivisionState(
+            remainder='0',
+            divisor=_to_digits(number2.limbs),
+            digits=stripped,
+            integer_digits=len(digits) - decimals,
+            negative=number1.sign != number2.sign and not number1.is_zero(),
+        )
+        return cls(state)
+
+    @property
+    def state(self) -> DivisionState:
+        # a snapshot that DivisionDigits(state) will carry on from
+        return DivisionState(
+            remainder=_to_digits(self._remainder),
+            divisor=self._divisor,
+            digits=self._digits[self._position:],
+            integer_digits=max(self._integer_end - self._position, 0),
+            started=self._started,
+            point=self._point,
+            negative=self._negative,
+        )
+
+    def __iter__(self) -> 'DivisionDigits':
+        return self
+
+    def __next__(self) -> str:
+        if self._negative:
+            self._negative = False
+            return '-'
+
+        # integer part of the quotient - skip leading zeroes, except for the units digit
+        while self._position < self._integer_end:
+            digit = self._step(int(self._digits[self._position]))
+            self._position += 1
+            if digit or self._started or self._position == self._integer_end:
+                self._started = True
+                return str(digit)
+
+        # decimal part - stop once we've used every digit and there's nothing left over
+        finished = self._position >= len(self._digits)
+        if finished and not self._remainder:
+            raise StopIteration
+        if not self._point:
+            self._point = True
+            return '.'
+
+        if finished:
+            return str(self._step(0))
+        digit = self._step(int(self._digits[self._position]))
+        self._position += 1
+        return str(digit)
+
+    def _step(self, digit: int) -> int:
+        # bring down the next digit, then take away the biggest multiple of the divisor that fits
+        remainder = _add(_multiply_small(self._remainder, 10), [digit] if digit else [])
+        low, high = 0, 9
+        while low < high:
+            middle = (low + high + 1) // 2
+            if _compare(self._multiples[middle], remainder) <= 0:
+                low = middle
+            else:
+                high = middle - 1
+        self._remainder = _subtract(remainder, self._multiples[low]) if low else remainder
+        return low
+
+
+def repeating_decimal(number1: Number, number2: Number, max_decimals: int) -> str | None:
+    # number1 / number2 exactly, with the repeating part of the decimals in brackets - 1 / 6 is
+    # "0.1(6)" - or just the digits if they stop. Once there are only zeroes left to bring down,
+    # each digit depends on nothing but the remainder, so when a remainder comes round again the
+    # digits since it was last seen repeat forever. None if that hasn't happened (and the digits
+    # haven't stopped) within max_decimals decimal places.
+    digits = DivisionDigits.start(number1, number2)
+    output = []
+    seen = {}
+    decimals = 0
+    while True:
+        if digits._point and digits._position >= len(digits._digits):
+            remainder = tuple(digits._remainder)
+            if remainder in seen:
+                return _bracket_period(''.join(output[:seen[remainder]]), ''.join(output[seen[remainder]:]))
+            seen[remainder] = len(output)
+            if decimals >= max_decimals:
+                return None
+        character = next(digits, None)
+        if character is None:
+            return ''.join(output)
+        output.append(character)
+        if digits._point and character != '.':
+            decimals += 1
+
+
+def _multiples(divisor: list[int]) -> list[list[int]]:
+    return [_multiply_small(divisor, i) for i in range(10)]
@@ -0,0 +1,185 @@
+'''Formulas over string numbers
+evaluate("(a - b) / b * 100", a="3.2", b="3.14") gives the same answer as
+multiply(divide(subtract(a, b), b), "100"), but the formula is only parsed once (compiled formulas
+are cached) and the in-between results stay as Numbers rather than going back and forth to strings.
+
+Compiling turns the formula into a list of steps where every distinct sub-expression only appears
+once - in "(a - b) / b + (a - b)", a - b is only worked out once. compile_expression() hands back
+the compiled formula to call directly with different values, e.g. in a loop.
+
+Supports + - * /, unary minus, brackets and sqrt(...). Divisions and square roots stop after
+max_decimals decimal places, just like divide() and sqrt().
+'''
+
+import re
+from functools import lru_cache
+
+from context import get_context
+from number import Number, to_number
+from operations import _divide
+
+
+_TOKEN = re.compile(r'\s*(?:((?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)|([A-Za-z_]\w*)|(\S))')
+_FUNCTIONS = ('sqrt',)
+
+
+class Expression:
+    # a compiled formula - call it with a value for each name to get the answer as a string
+    __slots__ = ('text', 'names', '_steps', '_result')
+
+    def __init__(self, text: str):
+        self.text = text
+        # each step is (operation, arguments), where the arguments of 'name' and 'number' steps
+        # are the name / Number itself, and otherwise are the positions of earlier steps
+        self._steps, self._result, self.names = _Parser(text).parse()
+
+    def __repr__(self) -> str:
+        return f'Expression({self.text!r})'
+
+    def __call__(self, max_decimals: int = 10, **values: str | Number) -> str:
+        return str(self.evaluate(max_decimals, **values))
+
+    def evaluate(self, max_decimals: int = 10, **values: str | Number) -> Number:
+        # the answer as a Number, for carrying on with
+        missing = [name for name in self.names if name not in values]
+        if missing:
+            raise ValueError(f"No value given for {', '.join(missing)} in '{self.text}'")
+
+        # like the operations themselves, every step is rounded to the current context's precision
+        context = get_context()
+        results: list[Number] = []
+        for operation, arguments in self._steps:
+            if operation == 'number':
+                result = arguments
+            elif operation == 'name':
+                result = to_number(values[arguments])
+            elif operation == 'negate':
+                result = -results[arguments[0]]
+            elif operation == 'sqrt':
+                result = results[arguments[0]].sqrt(max_decimals)
+            else:
+                left, right = results[arguments[0]], results[arguments[1]]
+                if operation == '+':
+                    result = left + right
+                elif operation == '-':
+                    result = left - right
+                elif operation == '*':
+                    result = left * right
+                else:
+                    result = _divide(left, right, max_decimals, context)
+                if operation != '/':
+                    result = result.rounded(context.precision, context.rounding)
+            results.append(result)
+        return results[self._result]
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text: str) -> Expression:
+    return Expression(text)
+
+
+def evaluate(text: str, max_decimals: int = 10, **values: str | Number) -> str:
+    return compile_expression(text)(max_decimals, **values)
+
+
+class _Parser:
+    # recursive descent over the usual precedence rules:
+    #   sum     = product (('+' | '-') product)*
+    #   product = unary (('*' | '/') unary)*
+    #   unary   = '-' unary | '+' unary | number | name | sqrt '(' sum ')' | '(' sum ')'
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = [match.groups() for match in _TOKEN.finditer(text.rstrip())]
+        self.position = 0
+        self.steps: list[tuple[str, object]] = []
+        self.seen: dict[tuple, int] = {}  # step -> its position, so repeats are shared
+        self.names: list[str] = []
+
+    def parse(self) -> tuple[list[tuple[str, object]], int, tuple[str, ...]]:
+        # the steps, which of them is the answer, and the names used
+        if not self.tokens:
+            raise ValueError("Empty expression")
+        result = self._sum()
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected '{self._token_text()}' in '{self.text}'")
+        return self.steps, result, tuple(self.names)
+
+    def _step(self, operation: str, arguments: object) -> int:
+        key = self._key(operation, arguments)
+        if key not in self.seen:
+            self.seen[key] = len(self.steps)
+            self.steps.append((operation, arguments))
+        return self.seen[key]
+
+    @staticmethod
+    def _key(operation: str, arguments: object) -> tuple:
+        if operation == 'number':
+            # "2" and "2.0" print differently, so they're different steps
+            return operation, str(arguments)
+        if operation in ('+', '*'):
+            # a + b and b + a are the same thing
+            return operation, tuple(sorted(arguments))
+        return operation, arguments
+
+    def _peek(self) -> tuple | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _token_text(self) -> str:
+        return next(part for part in self.tokens[self.position] if part is not None)
+
+    def _symbol(self, *symbols: str) -> str | None:
+        # the next token if it's one of `symbols`, moving past it
+        token = self._peek()
+        if token is not None and token[2] in symbols:
+            self.position += 1
+            return token[2]
+        return None
+
+    def _expect(self, symbol: str) -> None:
+        if self._symbol(symbol) is None:
+            found = f"'{self._token_text()}'" if self._peek() else 'the end'
+            raise ValueError(f"Expected '{symbol}' but found {found} in '{self.text}'")
+
+    def _sum(self) -> int:
+        left = self._product()
+        while (symbol := self._symbol('+', '-')) is not None:
+            left = self._step(symbol, (left, self._product()))
+        return left
+
+    def _product(self) -> int:
+        left = self._unary()
+        while (symbol := self._symbol('*', '/')) is not None:
+            left = self._step(symbol, (left, self._unary()))
+        return left
+
+    def _unary(self) -> int:
+        if self._symbol('-') is not None:
+            return self._step('negate', (self._unary(),))
+        if self._symbol('+') is not None:
+            return self._unary()
+        if self._symbol('(') is not None:
+            inner = self._sum()
+            self._expect(')')
+            return inner
+
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of '{self.text}'")
+        number, name, _ = token
+        if number is not None:
+            self.position += 1
+            return self._step('number', Number.from_string(number))
+        if name is not None:
+            self.position += 1
+            if name in _FUNCTIONS:
+                self._expect('(')
+                inner = self._sum()
+                self._expect(')')
+                return self._step(name, (inner,))
+            if self._peek() is not None and self._peek()[2] == '(':
+                raise ValueError(f"Unknown function '{name}' in '{self.text}'")
+            if name not in self.names:
+                self.names.append(name)
+            return self._step('name', name)
+        raise ValueError(f"Unexpected '{self._token_text()}' in '{self.text}'")
@@ -0,0 +1,340 @@
+'''Arithmetic on numbers kept in files
+Numbers with millions of digits are awkward as Python strings - every step makes another copy. These
+read each operand straight out of its file with mmap and write the answer straight to a file:
+
+  - add_files / subtract_files work down the columns a block of digits at a time, from the least
+    significant end, so however long the numbers are only a couple of blocks are ever in memory.
+  - multiply_files / divide_files build each operand's limbs directly from the file (no string copy
+    of it) and write the answer out a block at a time.
+
+The answers are exactly what add / subtract / multiply / divide in operations.py give, followed by
+a newline. From the command line:
+
+    python files.py multiply a.txt b.txt product.txt
+    python files.py divide a.txt b.txt quotient.txt --max-decimals 100000
+'''
+
+import argparse
+import mmap
+from contextlib import ExitStack
+from typing import NamedTuple
+
+from context import Context, ROUNDINGS, TRUNCATE
+from limbs import BASE_DIGITS, _add, _compare, _from_digits, _shift_left, _subtract, _to_digits, _trim
+from number import Number, _digit_count
+from operations import _context, _divide
+
+
+# Digits handled at a time - a multiple of BASE_DIGITS, so blocks line up with limbs
+BLOCK_DIGITS = 1000 * BASE_DIGITS
+
+
+class _Operand(NamedTuple):
+    # where a number's digits are in a mapped file, without copying them out
+    data: mmap.mmap
+    negative: bool
+    integer_start: int  # after any leading zeroes
+    integer_end: int
+    decimal_start: int
+    decimal_end: int
+    zero: bool
+
+    @property
+    def integer_digits(self) -> int:
+        return self.integer_end - self.integer_start
+
+    @property
+    def decimal_digits(self) -> int:
+        return self.decimal_end - self.decimal_start
+
+
+def add_files(path1: str, path2: str, out_path: str, context: Context | None = None) -> None:
+    _add_files(path1, path2, out_path, False, _context(context))
+
+
+def subtract_files(path1: str, path2: str, out_path: str, context: Context | None = None) -> None:
+    _add_files(path1, path2, out_path, True, _context(context))
+
+
+def multiply_files(path1: str, path2: str, out_path: str, context: Context | None = None) -> None:
+    context = _context(context)
+    with ExitStack() as stack:
+        number1 = _read_number(_open_operand(path1, stack))
+        number2 = _read_number(_open_operand(path2, stack))
+    _write_number((number1 * number2).rounded(context.precision, context.rounding), out_path)
+
+
+def divide_files(
+    path1: str,
+    path2: str,
+    out_path: str,
+    max_decimals: int = 10,
+    context: Context | None = None,
+) -> None:
+    with ExitStack() as stack:
+        dividend = _read_number(_open_operand(path1, stack))
+        divisor = _read_number(_open_operand(path2, stack))
+    _write_number(_divide(dividend, divisor, max_decimals, context), out_path)
+
+
+# Reading
+
+def _open_operand(path: str, stack: ExitStack) -> _Operand:
+    f = stack.enter_context(open(path, 'rb'))
+    try:
+        data = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except ValueError:  # an empty file can't be mapped
+        raise ValueError(f"Cannot interpret the contents of {path!r} as a number") from None
+
+    start, end = 0, len(data)
+    while start < end and data[start:start + 1].isspace():
+        start += 1
+    while end > start and data[end - 1:end].isspace():
+        end -= 1
+    negative = data[start:start + 1] == b'-'
+    if negative:
+        start += 1
+    point = data.find(b'.', start, end)
+    if point < 0:
+        integer_end = decimal_start = end
+    else:
+        integer_end, decimal_start = point, point + 1
+
+    if (
+        start == integer_end and decimal_start == end
+        or not _all_digits(data, start, integer_end)
+        or not _all_digits(data, decimal_start, end)
+    ):
+        raise ValueError(f"Cannot interpret the contents of {path!r} as a number")
+
+    integer_start = _skip_zeros(data, start, integer_end)
+    zero = integer_start == integer_end and _skip_zeros(data, decimal_start, end) == end
+    return _Operand(data, negative, integer_start, integer_end, decimal_start, end, zero)
+
+
+def _all_digits(data: mmap.mmap, start: int, end: int) -> bool:
+    return all(data[i:min(i + BLOCK_DIGITS, end)].isdigit() for i in range(start, end, BLOCK_DIGITS))
+
+
+def _skip_zeros(data: mmap.mmap, start: int, end: int) -> int:
+    # the position of the first non-zero digit in data[start:end], or end if there isn't one
+    for i in range(start, end, BLOCK_DIGITS):
+        block = data[i:min(i + BLOCK_DIGITS, end)]
+        stripped = block.lstrip(b'0')
+        if stripped:
+            return i + len(block) - len(stripped)
+    return end
+
+
+def _aligned(operand: _Operand, integer_digits: int, decimal_digits: int, start: int, end: int) -> bytes:
+    # digits start:end of the operand, lined up as if it had been padded with zeroes to
+    # integer_digits before the decimal point and decimal_digits after it
+    parts = []
+    if start < integer_digits:
+        padding = integer_digits - operand.integer_digits
+        stop = min(end, integer_digits)
+        parts.append(b'0' * max(min(stop, padding) - start, 0))
+        low, high = max(start, padding) - padding, stop - padding
+        if high > low:
+            parts.append(operand.data[operand.integer_start + low:operand.integer_start + high])
+    if end > integer_digits:
+        low, high = max(start, integer_digits) - integer_digits, end - integer_digits
+        kept = min(high, operand.decimal_digits)
+        if kept > low:
+            parts.append(operand.data[operand.decimal_start + low:operand.decimal_start + kept])
+        parts.append(b'0' * (high - max(low, operand.decimal_digits)))
+    return b''.join(parts)
+
+
+def _read_number(operand: _Operand) -> Number:
+    # limbs straight from the file, a block at a time from the least significant end
+    integer_digits, decimal_digits = operand.integer_digits, operand.decimal_digits
+    limbs = []
+    for end in range(integer_digits + decimal_digits, 0, -BLOCK_DIGITS):
+        block = _from_digits(_aligned(operand, integer_digits, decimal_digits, max(end - BLOCK_DIGITS, 0), end))
+        limbs.extend(block)
+        limbs.extend([0] * (BLOCK_DIGITS // BASE_DIGITS - len(block)))
+    return Number(-1 if operand.negative else 1, _trim(limbs), -decimal_digits)
+
+
+# Column addition / subtraction, block by block
+
+def _add_files(path1: str, path2: str, out_path: str, subtract: bool, context: Context) -> None:
+    with ExitStack() as stack:
+        operand1, operand2 = _open_operand(path1, stack), _open_operand(path2, stack)
+        if context.precision is not None:
+            # rounding needs the whole answer first - no different to operations.add
+            number1, number2 = _read_number(operand1), _read_number(operand2)
+            result = number1 - number2 if subtract else number1 + number2
+            _write_number(result.rounded(context.precision, context.rounding), out_path)
+            return
+
+        # the same decisions as Number's _add_signed - including that zero counts as positive
+        sign1 = -1 if operand1.negative and not operand1.zero else 1
+        sign2 = -1 if operand2.negative and not operand2.zero else 1
+        if subtract:
+            sign2 = -sign2
+        integer_digits = max(operand1.integer_digits, operand2.integer_digits, 1)
+        decimal_digits = max(operand1.decimal_digits, operand2.decimal_digits)
+
+        if sign1 == sign2:
+            # adding magnitudes keeps every decimal place
+            _column_pass(operand1, operand2, integer_digits, decimal_digits, out_path, sign1 < 0, False, False)
+            return
+
+        comparison = _compare_aligned(operand1, operand2, integer_digits, decimal_digits)
+        if comparison == 0:
+            with open(out_path, 'wb') as out:
+                out.write(b'0\n')
+        elif comparison > 0:
+            _column_pass(operand1, operand2, integer_digits, decimal_digits, out_path, sign1 < 0, True, True)
+        else:
+            _column_pass(operand2, operand1, integer_digits, decimal_digits, out_path, sign2 < 0, True, True)
+
+
+def _compare_aligned(operand1: _Operand, operand2: _Operand, integer_digits: int, decimal_digits: int) -> int:
+    # lined up, the first block that differs decides - and bytes compare just like the digits
+    for start in range(0, integer_digits + decimal_digits, BLOCK_DIGITS):
+        end = min(start + BLOCK_DIGITS, integer_digits + decimal_digits)
+        block1 = _aligned(operand1, integer_digits, decimal_digits, start, end)
+        block2 = _aligned(operand2, integer_digits, decimal_digits, start, end)
+        if block1 != block2:
+            return 1 if block1 > block2 else -1
+    return 0
+
+
+def _column_pass(
+    operand1: _Operand,
+    operand2: _Operand,
+    integer_digits: int,
+    decimal_digits: int,
+    out_path: str,
+    negative: bool,
+    subtract: bool,
+    normalize: bool,
+) -> None:
+    # |operand1| + |operand2|, or |operand1| - |operand2| when operand1 is the bigger. The answer
+    # is written where it belongs in an output file with room for a sign and a carry, from the
+    # least significant block up, then slid to the front once we know how many leading zeroes it has.
+    width = integer_digits + decimal_digits
+    point = 2 + integer_digits  # sign, carry, then the integer digits
+    length = point + (1 + decimal_digits if decimal_digits else 0)
+    with open(out_path, 'w+b') as out:
+        out.truncate(length)
+        with mmap.mmap(out.fileno(), length) as output:
+            carry = 0
+            for end in range(width, 0, -BLOCK_DIGITS):
+                start = max(end - BLOCK_DIGITS, 0)
+                size = end - start
+                a = _from_digits(_aligned(operand1, integer_digits, decimal_digits, start, end))
+                b = _from_digits(_aligned(operand2, integer_digits, decimal_digits, start, end))
+                if carry:
+                    b = _add(b, [1])
+                if not subtract:
+                    result = _add(a, b)
+                    digits = _to_digits(result) if result else ''
+                    carry = int(len(digits) > size)
+                    digits = digits[carry:]
+                elif _compare(a, b) >= 0:
+                    result, carry = _subtract(a, b), 0
+                else:
+                    # borrow from the next block along
+                    result, carry = _subtract(_add(a, _shift_left([1], size)), b), 1
+                if subtract:
+                    digits = _to_digits(result) if result else ''
+                digits = digits.rjust(size, '0').encode('ascii')
+
+                # digit i goes after the sign and carry, and after the point if it's a decimal
+                split = min(max(integer_digits - start, 0), size)
+                output[2 + start:2 + start + split] = digits[:split]
+                output[point + 1 + start + split - integer_digits:point + 1 + end - integer_digits] = digits[split:]
+            output[1:2] = b'1' if carry else b'0'
+            if decimal_digits:
+                output[point:point + 1] = b'.'
+
+            # drop leading zeroes (keeping the units digit), and trailing decimal zeroes if asked
+            first = _skip_zeros(output, 1, point - 1)
+            last = length
+            if normalize and decimal_digits:
+                last = _last_non_zero(output, point + 1, length)
+                if last == point + 1:
+                    last = point
+            if negative:
+                first -= 1
+                output[first:first + 1] = b'-'
+            output.move(0, first, last - first)
+        out.truncate(last - first)
+        out.seek(0, 2)
+        out.write(b'\n')
+
+
+def _last_non_zero(data: mmap.mmap, start: int, end: int) -> int:
+    # the position just after the last non-zero digit in data[start:end], or start if there isn't one
+    for i in range(end, start, -BLOCK_DIGITS):
+        block = data[max(i - BLOCK_DIGITS, start):i]
+        stripped = block.rstrip(b'0')
+        if stripped:
+            return i - len(block) + len(stripped)
+    return start
+
+
+# Writing
+
+def _write_number(number: Number, out_path: str) -> None:
+    # str(number), a block at a time
+    places = max(-number.exponent, 0)
+    digits = _digit_count(number.limbs) or 1
+    with open(out_path, 'wb') as out:
+        if number.sign < 0:
+            out.write(b'-')
+        written = 0
+        point = max(digits, places + 1) - places if places else None
+        for chunk in _digit_chunks(number, places + 1 - digits):
+            if point is not None and written <= point < written + len(chunk):
+                split = point - written
+                chunk = chunk[:split] + b'.' + chunk[split:]
+                written -= 1
+            out.write(chunk)
+            written += len(chunk)
+        out.write(b'\n')
+
+
+def _digit_chunks(number: Number, padding: int):
+    # zeroes to make up the decimal places, the digits of the limbs, then zeroes for a positive exponent
+    for _ in range(0, padding, BLOCK_DIGITS):
+        yield b'0' * min(BLOCK_DIGITS, padding)
+        padding -= BLOCK_DIGITS
+    limbs = number.limbs or [0]
+    step = BLOCK_DIGITS // BASE_DIGITS
+    for end in range(len(limbs), 0, -step):
+        block = limbs[max(end - step, 0):end]
+        if end == len(limbs):
+            yield _to_digits(block).encode('ascii') if number.limbs else b'0'
+        else:
+            yield ''.join(f'{limb:09d}' for limb in reversed(block)).encode('ascii')
+    zeros = max(number.exponent, 0)
+    for start in range(0, zeros, BLOCK_DIGITS):
+        yield b'0' * min(BLOCK_DIGITS, zeros - start)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Add, subtract, multiply or divide numbers kept in files")
+    parser.add_argument('operation', choices=('add', 'subtract', 'multiply', 'divide'))
+    parser.add_argument('number1', help="file holding the first number")
+    parser.add_argument('number2', help="file holding the second number")
+    parser.add_argument('output', help="file to write the answer to")
+    parser.add_argument('--max-decimals', type=int, default=10, help="decimal places to divide to")
+    parser.add_argument('--precision', type=int, default=None, help="significant digits to round the answer to")
+    parser.add_argument('--rounding', choices=ROUNDINGS, default=TRUNCATE)
+    args = parser.parse_args(argv)
+
+    context = Context(args.precision, args.rounding)
+    if args.operation == 'divide':
+        divide_files(args.number1, args.number2, args.output, args.max_decimals, context)
+    else:
+        operation = {'add': add_files, 'subtract': subtract_files, 'multiply': multiply_files}[args.operation]
+        operation(args.number1, args.number2, args.output, context)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+'''Where does the time go?
+Counts the calls to each operation in operations.py and schoolbook.py, the digits they were given,
+the carries and borrows of schoolbook addition / subtraction, how deeply the calls nest (e.g. when
+a negative number sends add() to subtract()) and how long each operation took - plus how many
+single-digit sums the schoolbook versions did with utils.py.
+
+    with profile() as result:
+        divide("1", "7", 10_000)
+    print(result.summary())
+    result.write_trace("trace.json")  # open in chrome://tracing or https://ui.perfetto.dev
+
+Setting ALGORITHMETIC_PROFILE=trace.json in the environment profiles the whole program instead:
+the summary goes to stderr and the trace to that file when it exits. For pi.py, use
+`python pi.py --profile trace.json`, which keeps the work in one process so it can all be seen.
+
+Profiling swaps the functions for counting versions while it's on and puts the originals back
+afterwards, so there's no cost at all when it's off. Each process only sees its own calls.
+'''
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import operations
+import schoolbook
+import utils
+from number import Number, _digit_count
+
+
+PROFILE_VARIABLE = 'ALGORITHMETIC_PROFILE'
+
+# Only this many calls are kept for the trace - the counters carry on after that
+TRACE_LIMIT = 100_000
+
+# the operations to time, and the single-digit ones to just count
+_OPERATIONS = {
+    operations: (
+        'add', 'subtract', 'multiply', 'divide', 'sqrt', 'power', 'power_mod', 'sum_numbers', 'sum_of_squares_lt_one',
+        'add_many', 'subtract_many', 'multiply_many', 'divide_many',
+    ),
+    schoolbook: ('add', 'subtract', 'multiply', 'divide', 'sum_numbers'),
+}
+_PRIMITIVES = {
+    utils: ('_add_ints', '_subtract_ints', '_multiply_ints'),
+}
+
+
+class OperationStats:
+    __slots__ = ('calls', 'digits', 'carries', 'borrows', 'depth', 'seconds', '_running')
+
+    def __init__(self):
+        self.calls = 0
+        self.digits = 0  # in the inputs, not counting signs and decimal points
+        self.carries = 0
+        self.borrows = 0
+        self.depth = 0  # the most instrumented calls that were in progress at once, this one included
+        self.seconds = 0.0  # a call inside another call of the same operation isn't counted twice
+        self._running = 0
+
+
+class Profile:
+    def __init__(self):
+        self.stats: dict[str, OperationStats] = {}
+        self.events: list[dict] = []  # complete ("X") events in the Chrome trace format
+        self.dropped = 0  # calls left out of events because of TRACE_LIMIT
+        self._depth = 0
+        self._start = time.perf_counter()
+
+    def as_dict(self) -> dict:
+        return {
+            name: {slot: getattr(stats, slot) for slot in OperationStats.__slots__ if not slot.startswith('_')}
+            for name, stats in self.stats.items()
+        }
+
+    def summary(self) -> str:
+        lines = [f"{'operation':<28}{'calls':>10}{'digits':>14}{'carries':>12}{'borrows':>12}{'depth':>7}{'seconds':>11}"]
+        for name, stats in sorted(self.stats.items(), key=lambda item: (-item[1].seconds, item[0])):
+            lines.append(
+                f"{name:<28}{stats.calls:>10}{stats.digits:>14}{stats.carries:>12}{stats.borrows:>12}"
+                f"{stats.depth:>7}{stats.seconds:>11.4f}"
+            )
+        if self.dropped:
+            lines.append(f"({self.dropped} calls not in the trace - see TRACE_LIMIT)")
+        return '\n'.join(lines)
+
+    def write_trace(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms', 'otherData': self.as_dict()}, f)
+
+    def _stats(self, name: str) -> OperationStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = OperationStats()
+        return stats
+
+
+_active: Profile | None = None
+_originals: dict[str, object] = {}
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    # count everything inside the with block - a profile inside another one takes the calls over
+    # until it finishes
+    global _active
+    previous = _active
+    _active = Profile()
+    if previous is None:
+        _install()
+    try:
+        yield _active
+    finally:
+        if previous is None:
+            _uninstall()
+        _active = previous
+
+
+def _install() -> None:
+    replacements = {}
+    for modules, primitive in ((_OPERATIONS, False), (_PRIMITIVES, True)):
+        for module, names in modules.items():
+            for name in names:
+                function = getattr(module, name)
+                qualified = f'{module.__name__}.{name}'
+                _originals[qualified] = function
+                replacements[id(function)] = function, _wrap(qualified, function, primitive)
+    _rebind(replacements)
+
+
+def _uninstall() -> None:
+    replacements = {}
+    for function in _originals.values():
+        replacements[id(function._instrumented)] = function._instrumented, function
+        del function._instrumented
+    _originals.clear()
+    _rebind(replacements)
+
+
+def _rebind(replacements: dict[int, tuple[object, object]]) -> None:
+    # swap every reference to the functions - `from operations import add` made a copy of the name
+    # in the importing module, so it isn't enough to change operations.add
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, '__dict__', None)
+        if not isinstance(namespace, dict):
+            continue
+        for name, value in list(namespace.items()):
+            replacement = replacements.get(id(value))
+            if replacement is not None and replacement[0] is value:
+                namespace[name] = replacement[1]
+
+
+def _wrap(name: str, function, primitive: bool):
+    if primitive:
+        def counted(*args, **kwargs):
+            if _active is not None:
+                _active._stats(name).calls += 1
+            return function(*args, **kwargs)
+
+        function._instrumented = counted
+        return counted
+
+    category = name.partition('.')[0]
+    carries = name in ('schoolbook.add', 'schoolbook.subtract')
+
+    def timed(*args, **kwargs):
+        profile = _active
+        if profile is None:
+            return function(*args, **kwargs)
+        stats = profile._stats(name)
+        stats.calls += 1
+        stats.digits += sum(map(_digits, args))
+        profile._depth += 1
+        stats.depth = max(stats.depth, profile._depth)
+        stats._running += 1
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            profile._depth -= 1
+            stats._running -= 1
+            if not stats._running:
+                stats.seconds += end - start
+            if len(profile.events) < TRACE_LIMIT:
+                profile.events.append({
+                    'name': name,
+                    'cat': category,
+                    'ph': 'X',
+                    'ts': (start - profile._start) * 1e6,
+                    'dur': (end - start) * 1e6,
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                })
+            else:
+                profile.dropped += 1
+
+        if carries and not any(arg.startswith('-') for arg in args[:2]):
+            _count_carries(stats, name, *args[:2], result)
+        return result
+
+    function._instrumented = timed
+    return timed
+
+
+def _digits(value) -> int:
+    if isinstance(value, str):
+        return len(value) - value.startswith('-') - ('.' in value)
+    if isinstance(value, Number):
+        return _digit_count(value.limbs)
+    if isinstance(value, (list, tuple)):
+        return sum(map(_digits, value))
+    return 0
+
+
+def _count_carries(stats: OperationStats, name: str, number1: str, number2: str, result: str) -> None:
+    # each carry turns a column sum of 10 or more into a digit 10 less and a 1 in the next column,
+    # so the digits of the answer add up to 9 less than those of the inputs, per carry. A
+    # subtraction borrows where the matching addition (smaller + difference = bigger) carries.
+    if name == 'schoolbook.add':
+        stats.carries += (_digit_sum(number1) + _digit_sum(number2) - _digit_sum(result)) // 9
+    else:
+        bigger = number2 if result.startswith('-') else number1
+        difference = _digit_sum(result)
+        smaller = _digit_sum(number1) + _digit_sum(number2) - _digit_sum(bigger)
+        stats.borrows += (smaller + difference - _digit_sum(bigger)) // 9
+
+
+def _digit_sum(number: str) -> int:
+    return sum(digit * number.count(str(digit)) for digit in range(1, 10))
+
+
+def _from_environment() -> None:
+    # ALGORITHMETIC_PROFILE=path - profile until the program exits
+    path = os.environ.get(PROFILE_VARIABLE)
+    if not path or _active is not None:
+        return
+    manager = profile()
+    result = manager.__enter__()
+
+    def finish() -> None:
+        manager.__exit__(None, None, None)
+        print(result.summary(), file=sys.stderr)
+        result.write_trace(path)
+        print(f"Trace written to {path}", file=sys.stderr)
+
+    atexit.register(finish)
+
+
+_from_environment()
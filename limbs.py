@@ -0,0 +1,548 @@
+'''Arithmetic on magnitudes stored as base-10^9 "limbs"
+The same column arithmetic as the school methods, except each column holds nine decimal digits
+instead of one. Magnitudes are little-endian lists of ints (least-significant limb first) with no
+leading zero limbs, so zero is the empty list.
+'''
+
+BASE_DIGITS = 9
+BASE = 10 ** BASE_DIGITS
+
+
+# Conversion to / from digit strings
+
+def _from_digits(digits: str) -> list[int]:
+    # chop the digit string into 9-digit chunks, starting from the right
+    limbs = [int(digits[max(i - BASE_DIGITS, 0):i]) for i in range(len(digits), 0, -BASE_DIGITS)]
+    return _trim(limbs)
+
+
+def _to_digits(limbs: list[int]) -> str:
+    if not limbs:
+        return '0'
+    # every limb except the most-significant one must keep its leading zeroes
+    return str(limbs[-1]) + ''.join(f'{limb:09d}' for limb in reversed(limbs[:-1]))
+
+
+def _trim(limbs: list[int]) -> list[int]:
+    # remove leading (most-significant) zero limbs
+    while limbs and not limbs[-1]:
+        limbs.pop()
+    return limbs
+
+
+# Comparison
+
+def _compare(a: list[int], b: list[int]) -> int:
+    if len(a) != len(b):
+        return 1 if len(a) > len(b) else -1
+    for i in range(len(a) - 1, -1, -1):
+        if a[i] != b[i]:
+            return 1 if a[i] > b[i] else -1
+    return 0
+
+
+# Addition and subtraction
+
+def _add(a: list[int], b: list[int]) -> list[int]:
+    if len(a) < len(b):
+        a, b = b, a
+
+    output = []
+    carry = 0
+    for i in range(len(b)):
+        result = a[i] + b[i] + carry
+        if result >= BASE:
+            output.append(result - BASE)
+            carry = 1
+        else:
+            output.append(result)
+            carry = 0
+
+    for i in range(len(b), len(a)):
+        if not carry:
+            # nothing left to carry - copy the rest of the longer number straight across
+            output.extend(a[i:])
+            break
+        result = a[i] + carry
+        if result >= BASE:
+            output.append(result - BASE)
+        else:
+            output.append(result)
+            carry = 0
+
+    if carry:
+        output.append(carry)
+    return output
+
+
+def _carry_columns(columns: list[int]) -> list[int]:
+    # limbs from column totals that can be any size - each column's overflow is carried into the
+    # next, so many numbers can be added into the same columns with a single carry pass at the end
+    output = []
+    carry = 0
+    for column in columns:
+        carry, limb = divmod(column + carry, BASE)
+        output.append(limb)
+    while carry:
+        carry, limb = divmod(carry, BASE)
+        output.append(limb)
+    return _trim(output)
+
+
+def _subtract(a: list[int], b: list[int]) -> list[int]:
+    # a - b, where the caller guarantees a >= b
+    output = []
+    borrow = 0
+    for i in range(len(b)):
+        result = a[i] - b[i] - borrow
+        if result < 0:
+            output.append(result + BASE)
+            borrow = 1
+        else:
+            output.append(result)
+            borrow = 0
+
+    for i in range(len(b), len(a)):
+        if not borrow:
+            output.extend(a[i:])
+            break
+        result = a[i] - borrow
+        if result < 0:
+            output.append(result + BASE)
+        else:
+            output.append(result)
+            borrow = 0
+
+    return _trim(output)
+
+
+# Multiplication
+
+def _multiply_small(a: list[int], m: int) -> list[int]:
+    # multiply by a single limb (0 <= m < BASE)
+    if not a or not m:
+        return []
+    output = []
+    carry = 0
+    for limb in a:
+        carry, result = divmod(limb * m + carry, BASE)
+        output.append(result)
+    if carry:
+        output.append(carry)
+    return output
+
+
+# Below these lengths (in limbs, of the shorter operand) the simpler method is quicker - the clever
+# methods save multiplications but pay for it with extra additions and bookkeeping
+KARATSUBA_THRESHOLD = 32
+TOOM3_THRESHOLD = 150
+
+
+def _multiply(a: list[int], b: list[int]) -> list[int]:
+    if not a or not b:
+        return []
+    if len(a) < len(b):
+        a, b = b, a
+
+    if len(b) < KARATSUBA_THRESHOLD:
+        return _multiply_schoolbook(a, b)
+    if len(a) >= 2 * len(b):
+        return _multiply_unbalanced(a, b)
+    if len(b) < TOOM3_THRESHOLD:
+        return _multiply_karatsuba(a, b)
+    return _multiply_toom3(a, b)
+
+
+def _multiply_schoolbook(a: list[int], b: list[int]) -> list[int]:
+    # long multiplication - one row of partial products per limb of b
+    if not a or not b:
+        return []
+    if len(a) < len(b):
+        a, b = b, a
+
+    output = [0] * (len(a) + len(b))
+    for j, limb2 in enumerate(b):
+        if not limb2:
+            continue
+        carry = 0
+        for i, limb1 in enumerate(a, j):
+            carry, output[i] = divmod(output[i] + limb1 * limb2 + carry, BASE)
+        output[j + len(a)] = carry
+    return _trim(output)
+
+
+def _multiply_unbalanced(a: list[int], b: list[int]) -> list[int]:
+    # a is much longer than b: multiply b by b-sized chunks of a and add the rows together
+    output = [0] * (len(a) + len(b))
+    for offset in range(0, len(a), len(b)):
+        _add_at(output, _multiply(_trim(a[offset:offset + len(b)]), b), offset)
+    return _trim(output)
+
+
+def _multiply_karatsuba(a: list[int], b: list[int]) -> list[int]:
+    # (a1.x + a0)(b1.x + b0) needs only 3 multiplications, because the middle term
+    # a1.b0 + a0.b1 = (a0 + a1)(b0 + b1) - a0.b0 - a1.b1
+    half = len(a) // 2
+    a0, a1 = _trim(a[:half]), a[half:]
+    b0, b1 = _trim(b[:half]), _trim(b[half:])
+
+    low = _multiply(a0, b0)
+    high = _multiply(a1, b1)
+    return _karatsuba_combine(low, _multiply(_add(a0, a1), _add(b0, b1)), high, half, len(a) + len(b))
+
+
+def _karatsuba_combine(low: list[int], cross: list[int], high: list[int], half: int, length: int) -> list[int]:
+    # low + (cross - low - high).x + high.x^2 with x = BASE^half, for a product of `length` limbs
+    middle = _subtract(_subtract(cross, low), high)
+    output = [0] * (length + 1)
+    _add_at(output, low, 0)
+    _add_at(output, middle, half)
+    _add_at(output, high, 2 * half)
+    return _trim(output)
+
+
+def _square(a: list[int]) -> list[int]:
+    # a * a - the same methods as _multiply, but making use of the two operands being the same
+    if not a:
+        return []
+    if len(a) < KARATSUBA_THRESHOLD:
+        return _square_schoolbook(a)
+    if len(a) < TOOM3_THRESHOLD:
+        return _square_karatsuba(a)
+    return _multiply_toom3(a, a)
+
+
+def _square_schoolbook(a: list[int]) -> list[int]:
+    # every a_i.a_j with i != j turns up twice in the square (as a_i.a_j and a_j.a_i), so only
+    # work out the ones with i < j, double them, and add the a_i.a_i on the diagonal - about half
+    # the limb products of long multiplication
+    n = len(a)
+    output = [0] * (2 * n)
+    for j, limb2 in enumerate(a):
+        if not limb2:
+            continue
+        carry = 0
+        for i in range(j + 1, n):
+            carry, output[i + j] = divmod(output[i + j] + a[i] * limb2 + carry, BASE)
+        output[j + n] = carry
+
+    carry = 0
+    for i, limb in enumerate(a):
+        high, low = divmod(limb * limb, BASE)
+        carry, output[2 * i] = divmod(2 * output[2 * i] + low + carry, BASE)
+        carry, output[2 * i + 1] = divmod(2 * output[2 * i + 1] + high + carry, BASE)
+    return _trim(output)
+
+
+def _square_karatsuba(a: list[int]) -> list[int]:
+    # (a1.x + a0)^2 = a1^2.x^2 + ((a0 + a1)^2 - a0^2 - a1^2).x + a0^2 - three squares of half the size
+    half = len(a) // 2
+    a0, a1 = _trim(a[:half]), a[half:]
+
+    low = _square(a0)
+    high = _square(a1)
+    return _karatsuba_combine(low, _square(_add(a0, a1)), high, half, 2 * len(a))
+
+
+def _multiply_toom3(a: list[int], b: list[int]) -> list[int]:
+    # Toom-Cook: split both numbers into 3 pieces, i.e. 2nd-order polynomials in x = BASE^third.
+    # Their product is a 4th-order polynomial, which is pinned down by its value at 5 points
+    # (0, 1, -1, -2 and infinity), so we only need 5 multiplications instead of 9.
+    third = (len(a) + 2) // 3
+    values = [_signed_multiply(x, y) for x, y in zip(_toom3_points(a, third), _toom3_points(b, third))]
+    return _toom3_combine(values, third, len(a) + len(b))
+
+
+def _toom3_points(a: list[int], third: int) -> list[tuple[int, list[int]]]:
+    # a as c0 + c1.x + c2.x^2, valued at 0, 1, -1, -2 and infinity - intermediate values can be
+    # negative, so carry (sign, limbs) pairs around
+    c0, c1, c2 = _trim(a[:third]), _trim(a[third:2 * third]), _trim(a[2 * third:])
+    return [(1, c0), _evaluate(c0, c1, c2, 1), _evaluate(c0, c1, c2, -1), _evaluate(c0, c1, c2, -2), (1, c2)]
+
+
+def _toom3_combine(values: list[tuple[int, list[int]]], third: int, length: int) -> list[int]:
+    # the product of `length` limbs from its values at the points of _toom3_points
+    r0, r1, r_minus1, r_minus2, r_inf = values
+
+    # interpolate (Bodrato's sequence) - every division here is exact
+    c3 = _signed_divide_small(_signed_subtract(r_minus2, r1), 3)
+    c1 = _signed_divide_small(_signed_subtract(r1, r_minus1), 2)
+    c2 = _signed_subtract(r_minus1, r0)
+    c3 = _signed_add(_signed_divide_small(_signed_subtract(c2, c3), 2), (1, _multiply_small(r_inf[1], 2)))
+    c2 = _signed_subtract(_signed_add(c2, c1), r_inf)
+    c1 = _signed_subtract(c1, c3)
+
+    output = [0] * (length + 1)
+    for power, (sign, coefficient) in enumerate((r0, c1, c2, c3, r_inf)):
+        assert sign > 0 or not coefficient, "Toom-3 coefficients must not be negative"
+        _add_at(output, coefficient, power * third)
+    return _trim(output)
+
+
+def _evaluate(c0: list[int], c1: list[int], c2: list[int], x: int) -> tuple[int, list[int]]:
+    # c0 + c1.x + c2.x^2 for a small x
+    value = _signed_add((1, c0), (1 if x > 0 else -1, _multiply_small(c1, abs(x))))
+    return _signed_add(value, (1, _multiply_small(c2, x * x)))
+
+
+def _add_at(target: list[int], value: list[int], offset: int) -> None:
+    # target += value * BASE^offset, in place (target must be long enough to hold the result)
+    carry = 0
+    i = offset
+    for limb in value:
+        result = target[i] + limb + carry
+        if result >= BASE:
+            target[i] = result - BASE
+            carry = 1
+        else:
+            target[i] = result
+            carry = 0
+        i += 1
+    while carry:
+        result = target[i] + carry
+        if result >= BASE:
+            target[i] = result - BASE
+        else:
+            target[i] = result
+            carry = 0
+        i += 1
+
+
+# Signed helpers for Toom-3, where (sign, limbs) represents sign * limbs
+
+def _signed_add(x: tuple[int, list[int]], y: tuple[int, list[int]]) -> tuple[int, list[int]]:
+    (sign1, a), (sign2, b) = x, y
+    if sign1 == sign2:
+        return sign1, _add(a, b)
+    if _compare(a, b) >= 0:
+        return sign1, _subtract(a, b)
+    return sign2, _subtract(b, a)
+
+
+def _signed_subtract(x: tuple[int, list[int]], y: tuple[int, list[int]]) -> tuple[int, list[int]]:
+    return _signed_add(x, (-y[0], y[1]))
+
+
+def _signed_multiply(x: tuple[int, list[int]], y: tuple[int, list[int]]) -> tuple[int, list[int]]:
+    return x[0] * y[0], _multiply(x[1], y[1])
+
+
+def _signed_divide_small(x: tuple[int, list[int]], d: int) -> tuple[int, list[int]]:
+    quotient, remainder = _divmod_small(x[1], d)
+    assert remainder == 0, "Toom-3 interpolation divisions must be exact"
+    return x[0], quotient
+
+
+# Powers of ten
+
+def _shift_left(a: list[int], places: int) -> list[int]:
+    # multiply by 10 ** places
+    if not a or not places:
+        return a
+    whole, part = divmod(places, BASE_DIGITS)
+    return [0] * whole + _multiply_small(a, 10 ** part)
+
+
+def _shift_right(a: list[int], places: int) -> list[int]:
+    # integer division by 10 ** places (truncating)
+    whole, part = divmod(places, BASE_DIGITS)
+    quotient, _ = _divmod_small(a[whole:], 10 ** part)
+    return quotient
+
+
+def _trailing_zeros(a: list[int]) -> int:
+    # how many decimal zeroes are at the end of the number
+    zeros = 0
+    for limb in a:
+        if limb:
+            while limb % 10 == 0:
+                limb //= 10
+                zeros += 1
+            return zeros
+        zeros += BASE_DIGITS
+    return zeros
+
+
+# Division
+
+def _divmod_small(a: list[int], d: int) -> tuple[list[int], int]:
+    # divide by a single limb (0 < d < BASE)
+    output = [0] * len(a)
+    remainder = 0
+    for i in range(len(a) - 1, -1, -1):
+        output[i], remainder = divmod(remainder * BASE + a[i], d)
+    return _trim(output), remainder
+
+
+# Long division is cheaper until both the divisor and the quotient are at least this many limbs.
+# It also stays cheaper when the quotient is much longer than the divisor, because then long
+# division is only linear in the length of the quotient.
+NEWTON_DIVISION_THRESHOLD = 200
+
+
+def _divmod(a: list[int], b: list[int]) -> tuple[list[int], list[int]]:
+    if not b:
+        raise ZeroDivisionError()
+    if _compare(a, b) < 0:
+        return [], list(a)
+    if len(b) == 1:
+        quotient, remainder = _divmod_small(a, b[0])
+        return quotient, [remainder] if remainder else []
+    quotient_length = len(a) - len(b)
+    if len(b) >= NEWTON_DIVISION_THRESHOLD and NEWTON_DIVISION_THRESHOLD <= quotient_length <= 4 * len(b):
+        return _divmod_newton(a, b)
+    return _divmod_schoolbook(a, b)
+
+
+def _divmod_schoolbook(a: list[int], b: list[int]) -> tuple[list[int], list[int]]:
+    # long division, guessing one whole limb of the quotient at a time (Knuth's algorithm D)
+    # the caller guarantees a >= b and that b has at least 2 limbs
+    # scale both numbers so the divisor's leading limb is large - this keeps each guess of the
+    # quotient limb within 2 of the true value
+    scale = BASE // (b[-1] + 1)
+    u = _multiply_small(a, scale) if scale > 1 else list(a)
+    v = _multiply_small(b, scale) if scale > 1 else b
+    if len(u) == len(a):
+        u.append(0)
+
+    n = len(v)
+    v_top, v_next = v[-1], v[-2]
+    quotient = [0] * (len(u) - n)
+    for j in range(len(u) - n - 1, -1, -1):
+        numerator = u[j + n] * BASE + u[j + n - 1]
+        guess, remainder = divmod(numerator, v_top)
+        while guess >= BASE or guess * v_next > remainder * BASE + u[j + n - 2]:
+            guess -= 1
+            remainder += v_top
+            if remainder >= BASE:
+                break
+
+        # subtract guess * v from the current window of u
+        borrow = 0
+        carry = 0
+        for i in range(n):
+            carry, product = divmod(guess * v[i] + carry, BASE)
+            result = u[i + j] - product - borrow
+            if result < 0:
+                u[i + j] = result + BASE
+                borrow = 1
+            else:
+                u[i + j] = result
+                borrow = 0
+        result = u[j + n] - carry - borrow
+        if result < 0:
+            # the guess was one too big - add the divisor back once
+            u[j + n] = result + BASE
+            guess -= 1
+            carry = 0
+            for i in range(n):
+                result = u[i + j] + v[i] + carry
+                if result >= BASE:
+                    u[i + j] = result - BASE
+                    carry = 1
+                else:
+                    u[i + j] = result
+                    carry = 0
+            u[j + n] = (u[j + n] + carry) % BASE
+        else:
+            u[j + n] = result
+        quotient[j] = guess
+
+    remainder = _trim(u[:n])
+    if scale > 1:
+        remainder, _ = _divmod_small(remainder, scale)
+    return _trim(quotient), remainder
+
+
+def _divmod_newton(a: list[int], b: list[int]) -> tuple[list[int], list[int]]:
+    # a / b = a * (1 / b): work out the reciprocal of b, multiply, and then fix up the last digit
+    precision = len(a) - len(b) + 2
+    reciprocal = _reciprocal(b, precision)
+
+    # the lowest limbs of a are too small to change the estimate, so leave them out
+    dropped = max(len(b) - 2, 0)
+    quotient = _multiply(a[dropped:], reciprocal)[len(b) + precision - dropped:]
+
+    # the estimate can be out by a little either way - correct it using the remainder
+    product = _multiply(quotient, b)
+    while _compare(product, a) > 0:
+        quotient = _subtract(quotient, [1])
+        product = _subtract(product, b)
+    remainder = _subtract(a, product)
+    while _compare(remainder, b) >= 0:
+        quotient = _add(quotient, [1])
+        remainder = _subtract(remainder, b)
+    return quotient, remainder
+
+
+def _reciprocal(v: list[int], precision: int) -> list[int]:
+    # approximately BASE ** (len(v) + precision) // v, i.e. 1 / v to `precision` limbs, found with
+    # Newton's method: x -> x + x * (1 - v.x). Each step doubles the number of correct limbs, so
+    # we get a half-precision answer first (recursively) and then take a single step.
+    if len(v) > precision + 2:
+        # only the leading limbs of v can affect this many limbs of the answer
+        v = v[len(v) - precision - 2:]
+    if precision < NEWTON_DIVISION_THRESHOLD:
+        numerator = [0] * (len(v) + precision) + [1]
+        if len(v) == 1:
+            return _divmod_small(numerator, v[0])[0]
+        return _divmod_schoolbook(numerator, v)[0]
+
+    half = precision // 2 + 1
+    y = _reciprocal(v, half)
+
+    # how far v.y is from 1 (scaled by BASE ** (len(v) + half)) - it can be out either way
+    one = [0] * (len(v) + half) + [1]
+    vy = _multiply(v, y)
+    if _compare(vy, one) <= 0:
+        sign, error = 1, _subtract(one, vy)
+    else:
+        sign, error = -1, _subtract(vy, one)
+
+    # x = y * BASE ** (precision - half); the correction is x * error, rescaled. Low limbs of the
+    # error are too small to matter, so they're dropped before multiplying.
+    shift = len(v) + 2 * half - precision
+    dropped = min(max(len(v) + half - precision - 2, 0), shift)
+    correction = _multiply(y, error[dropped:])[shift - dropped:]
+    x = [0] * (precision - half) + y
+    if sign > 0:
+        return _add(x, correction)
+    return _subtract(x, correction)
+
+
+# Square root
+
+def _isqrt(a: list[int]) -> list[int]:
+    # the biggest x with x * x <= a, by Newton's method: x -> (x + a / x) / 2
+    if len(a) <= 2:
+        # small enough to guess-and-check a single limb (at most BASE - 1)
+        value = a[1] * BASE + a[0] if len(a) == 2 else (a[0] if a else 0)
+        low, high = 0, BASE - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if middle * middle <= value:
+                low = middle
+            else:
+                high = middle - 1
+        return [low] if low else []
+
+    # the square root of the top half of the limbs gives the top half of the answer - round it up
+    # so we start from an over-estimate, and then Newton's method only ever comes down
+    quarter = max(len(a) // 4, 1)
+    x = [0] * quarter + _add(_isqrt(a[2 * quarter:]), [1])
+    while True:
+        quotient, _ = _divmod(a, x)
+        y, _ = _divmod_small(_add(x, quotient), 2)
+        if _compare(y, x) >= 0:
+            return x
+        x = y
+
+
+# Greatest common divisor
+
+def _gcd(a: list[int], b: list[int]) -> list[int]:
+    # Euclid's algorithm: gcd(a, b) = gcd(b, a mod b), until the remainder runs out
+    while b:
+        _, remainder = _divmod(a, b)
+        a, b = b, remainder
+    return a
@@ -0,0 +1,372 @@
+'''Internal decimal representation used by the operations
+Parsing "123.456" digit-by-digit for every single operation is slow, so numbers are parsed once into
+a sign, a coefficient of base-10^9 limbs and a power-of-ten exponent, i.e. 123.456 is stored as
++123456 x 10^-3. Arithmetic happens on this form and we only go back to a string at the end.
+'''
+
+from limbs import (
+    BASE_DIGITS,
+    _add,
+    _compare,
+    _divmod,
+    _from_digits,
+    _isqrt,
+    _multiply,
+    _shift_left,
+    _shift_right,
+    _square,
+    _subtract,
+    _to_digits,
+    _trailing_zeros,
+)
+
+
+# How to round when digits have to go (see context.py): towards zero, to the nearest (ties to the
+# even digit / away from zero), or always up / always down
+TRUNCATE = 'truncate'
+HALF_EVEN = 'half-even'
+HALF_UP = 'half-up'
+CEILING = 'ceiling'
+FLOOR = 'floor'
+ROUNDINGS = (TRUNCATE, HALF_EVEN, HALF_UP, CEILING, FLOOR)
+
+
+class Number:
+    __slots__ = ('sign', 'limbs', 'exponent')
+
+    def __init__(self, sign: int, limbs: list[int], exponent: int = 0):
+        # value = sign * limbs * 10 ** exponent, where sign is 1 or -1
+        self.sign = sign if limbs else 1
+        self.limbs = limbs
+        self.exponent = exponent
+
+    @classmethod
+    def from_string(cls, value: str) -> 'Number':
+        # plain ("-123.456") or scientific ("1.5e-300") notation. The zeroes at the end of a whole
+        # number and at the start of the decimals only go into the exponent, so "1" followed by a
+        # million zeroes is a single limb rather than 111,112 of them
+        sign = 1
+        digits = value
+        if digits.startswith('-'):
+            sign = -1
+            digits = digits[1:]
+
+        exponent = 0
+        if 'e' in digits or 'E' in digits:
+            digits, _, power = digits.replace('E', 'e').partition('e')
+            unsigned = power[1:] if power.startswith(('+', '-')) else power
+            if not unsigned.isdigit():
+                raise ValueError(f"Cannot interpret {value!r} as a number")
+            exponent = int(power)
+
+        if '.' in digits:
+            integer, decimal = digits.split('.', 1)
+        else:
+            integer, decimal = digits, ''
+
+        if not (integer or decimal) or not f'{integer}{decimal}'.isdigit():
+            raise ValueError(f"Cannot interpret {value!r} as a number")
+
+        if not decimal:
+            stripped = integer.rstrip('0')
+            if stripped:
+                exponent += len(integer) - len(stripped)
+                integer = stripped
+        limbs = _from_digits(f'{integer}{decimal}'.lstrip('0'))
+        exponent -= len(decimal)
+        if not limbs:
+            # 0e5 is just 0 - zero only keeps its decimal places
+            exponent = min(exponent, 0)
+        return cls(sign, limbs, exponent)
+
+    def __str__(self) -> str:
+        digits = _to_digits(self.limbs)
+        if self.exponent > 0:
+            digits = f"{digits}{'0' * self.exponent}"
+        elif self.exponent < 0:
+            places = -self.exponent
+            digits = digits.rjust(places + 1, '0')
+            digits = f'{digits[:-places]}.{digits[-places:]}'
+        if self.sign < 0:
+            return f'-{digits}'
+        return digits
+
+    def scientific(self) -> str:
+        # str() in scientific notation, with one digit before the point and no zeroes at the end:
+        # 1500 is "1.5e3" and -0.00015 is "-1.5e-4"
+        if not self.limbs:
+            return '0e0'
+        number = self.stripped()
+        digits = _to_digits(number.limbs)
+        mantissa = f'{digits[0]}.{digits[1:]}' if len(digits) > 1 else digits
+        sign = '-' if self.sign < 0 else ''
+        return f'{sign}{mantissa}e{number.exponent + len(digits) - 1}'
+
+    def __repr__(self) -> str:
+        return f"Number('{self}')"
+
+    def is_zero(self) -> bool:
+        return not self.limbs
+
+    def normalized(self) -> 'Number':
+        # equivalent of _clean_number: drop trailing zeroes after the decimal point
+        if not self.limbs:
+            return Number(1, [], 0)
+        if self.exponent >= 0:
+            return self
+        places = min(_trailing_zeros(self.limbs), -self.exponent)
+        if not places:
+            return self
+        return Number(self.sign, _shift_right(self.limbs, places), self.exponent + places)
+
+    def stripped(self) -> 'Number':
+        # every zero at the end moved into the exponent, decimal places or not - the shortest
+        # coefficient, for when only the value matters (1500 is 15 x 10^2)
+        if not self.limbs:
+            return Number(1, [], 0)
+        places = _trailing_zeros(self.limbs)
+        if not places:
+            return self
+        return Number(self.sign, _shift_right(self.limbs, places), self.exponent + places)
+
+    def __neg__(self) -> 'Number':
+        return Number(-self.sign, self.limbs, self.exponent)
+
+    def __abs__(self) -> 'Number':
+        return Number(1, self.limbs, self.exponent)
+
+    def __add__(self, other: 'Number') -> 'Number':
+        return _add_signed(self, other, other.sign)
+
+    def __sub__(self, other: 'Number') -> 'Number':
+        # not self + -other: the sign of zero decides between column addition and subtraction
+        return _add_signed(self, other, -other.sign)
+
+    def __mul__(self, other: 'Number') -> 'Number':
+        if not self.limbs or not other.limbs:
+            return Number(1, [], 0)
+        # x * x only needs about half the work, and zeroes at the end only add to the exponent
+        number1, number2 = _without_zero_limbs(self), _without_zero_limbs(other)
+        if self.limbs is other.limbs and self.exponent == other.exponent:
+            limbs = _square(number1.limbs)
+        else:
+            limbs = _multiply(number1.limbs, number2.limbs)
+        return Number(self.sign * other.sign, limbs, number1.exponent + number2.exponent).normalized()
+
+    def power(self, exponent: int) -> 'Number':
+        # self ** exponent exactly, for a whole exponent >= 0, by squaring and multiplying: working
+        # through the exponent's bits from the top, each bit squares what we have so far and each
+        # 1 bit also multiplies it by self - so x^13 = ((x^2 . x)^2)^2 . x, which is 5 steps, not 12
+        if exponent < 0:
+            raise ValueError(f"Exponent must be a whole number >= 0, not {exponent}")
+        base = self.normalized()
+        limbs = [1]
+        for bit in bin(exponent)[2:]:
+            limbs = _square(limbs)
+            if bit == '1':
+                limbs = _multiply(limbs, base.limbs)
+        sign = base.sign if exponent % 2 else 1
+        return Number(sign, limbs, base.exponent * exponent).normalized()
+
+    def divide(
+        self,
+        other: 'Number',
+        max_decimals: int = 10,
+        rounding: str = TRUNCATE,
+        precision: int | None = None,
+    ) -> 'Number':
+        # to max_decimals decimal places - or `precision` significant digits, if that's fewer -
+        # truncated unless another rounding is asked for
+        if not other.limbs:
+            raise ZeroDivisionError()
+        if not self.limbs:
+            return Number(1, [], 0)
+
+        numerator, denominator, decimals = _division_operands(self, other, max_decimals, rounding, precision)
+        quotient, remainder = _divmod(numerator, denominator)
+        return _division_result(self.sign * other.sign, quotient, remainder, max_decimals, decimals, rounding, precision)
+
+    def rounded(self, precision: int | None, rounding: str = TRUNCATE) -> 'Number':
+        # to at most `precision` significant digits - None means keep them all
+        if precision is None:
+            return self
+        drop = _digit_count(self.limbs) - _check_precision(precision)
+        if drop <= 0:
+            return self
+        limbs = _round(self.sign, self.limbs, drop, rounding)
+        if _digit_count(limbs) > precision:
+            limbs, drop = _shift_right(limbs, 1), drop + 1
+        return Number(self.sign, limbs, self.exponent + drop)
+
+    def sqrt(self, max_decimals: int = 10) -> 'Number':
+        # truncated (not rounded) to max_decimals decimal places, like divide
+        if self.sign < 0:
+            raise ValueError(f"Cannot take the square root of a negative number ({self})")
+
+        # sqrt(A x 10^e) x 10^max_decimals = sqrt(A x 10^(e + 2 x max_decimals))
+        shift = self.exponent + 2 * max_decimals
+        if shift >= 0:
+            radicand = _shift_left(self.limbs, shift)
+        else:
+            radicand = _shift_right(self.limbs, -shift)
+        return Number(1, _isqrt(radicand), -max_decimals).normalized()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Number):
+            return NotImplemented
+        return _compare_numbers(self, other) == 0
+
+    def __lt__(self, other: 'Number') -> bool:
+        return _compare_numbers(self, other) < 0
+
+    def __le__(self, other: 'Number') -> bool:
+        return _compare_numbers(self, other) <= 0
+
+    def __gt__(self, other: 'Number') -> bool:
+        return _compare_numbers(self, other) > 0
+
+    def __ge__(self, other: 'Number') -> bool:
+        return _compare_numbers(self, other) >= 0
+
+    def __hash__(self) -> int:
+        number = self.stripped()
+        return hash((number.sign, tuple(number.limbs), number.exponent))
+
+
+def _add_signed(number1: Number, number2: Number, sign2: int) -> Number:
+    # number1 + sign2 * |number2|
+    a, b, exponent = _aligned(number1, number2)
+    if number1.sign == sign2:
+        # adding magnitudes keeps every decimal place, like column addition does ("0.8" + "0.2" = "1.0")
+        return Number(sign2, _add(a, b), exponent)
+
+    # subtracting magnitudes - take the smaller from the bigger and clean up the result
+    comparison = _compare(a, b)
+    if comparison == 0:
+        return Number(1, [], 0)
+    elif comparison > 0:
+        return Number(number1.sign, _subtract(a, b), exponent).normalized()
+    else:
+        return Number(sign2, _subtract(b, a), exponent).normalized()
+
+
+def _division_operands(
+    number1: Number,
+    number2: Number,
+    max_decimals: int,
+    rounding: str,
+    precision: int | None,
+) -> tuple[list[int], list[int], int]:
+    # number1 / number2 * 10 ** decimals, shuffled around so we only ever divide integers. When
+    # there's rounding to do, that's one decimal more than max_decimals to round with.
+    decimals = max_decimals if rounding == TRUNCATE and precision is None else max_decimals + 1
+    number1, number2 = _without_zero_limbs(number1), _without_zero_limbs(number2)
+    shift = number1.exponent - number2.exponent + decimals
+    numerator, denominator = number1.limbs, number2.limbs
+    if shift >= 0:
+        numerator = _shift_left(numerator, shift)
+    else:
+        denominator = _shift_left(denominator, -shift)
+    return numerator, denominator, decimals
+
+
+def _division_result(
+    sign: int,
+    quotient: list[int],
+    remainder: list[int],
+    max_decimals: int,
+    decimals: int,
+    rounding: str,
+    precision: int | None,
+) -> Number:
+    # the quotient and remainder of _division_operands, rounded as Number.divide promises
+    if decimals == max_decimals:
+        return Number(sign, quotient, -max_decimals).normalized()
+
+    # there's one digit past max_decimals to round with, plus whatever the remainder says
+    drop = 1
+    if precision is not None:
+        drop = max(drop, _digit_count(quotient) - _check_precision(precision))
+    quotient = _round(sign, quotient, drop, rounding, bool(remainder))
+    if precision is not None and _digit_count(quotient) > precision:
+        # rounded up to the next power of ten, e.g. 9.99 -> 10.0
+        quotient, drop = _shift_right(quotient, 1), drop + 1
+    return Number(sign, quotient, drop - decimals).normalized()
+
+
+def _digit_count(limbs: list[int]) -> int:
+    if not limbs:
+        return 0
+    return (len(limbs) - 1) * BASE_DIGITS + len(str(limbs[-1]))
+
+
+def _check_precision(precision: int) -> int:
+    if precision < 1:
+        raise ValueError(f"Precision must be at least 1 significant digit, not {precision}")
+    return precision
+
+
+def _round(sign: int, limbs: list[int], drop: int, rounding: str, inexact: bool = False) -> list[int]:
+    # limbs with the last `drop` digits taken off, rounded according to `rounding` (the result is
+    # worth 10^drop times as much per unit). `inexact` means there was something non-zero even
+    # further along than the digits being dropped.
+    if rounding not in ROUNDINGS:
+        raise ValueError(f"Unknown rounding {rounding!r}, expected one of {', '.join(ROUNDINGS)}")
+    kept = _shift_right(limbs, drop)
+    dropped = _subtract(limbs, _shift_left(kept, drop)) if kept else list(limbs)
+    if rounding == TRUNCATE or not (dropped or inexact):
+        return kept
+
+    if rounding in (CEILING, FLOOR):
+        # away from zero only when that's the direction we're rounding in
+        up = (sign > 0) == (rounding == CEILING)
+    else:
+        # compare what's being dropped with half a unit of what's kept
+        half = _shift_left([5], drop - 1)
+        comparison = _compare(dropped, half) or (1 if inexact else 0)
+        if comparison == 0:
+            up = rounding == HALF_UP or bool(kept and kept[0] % 2)
+        else:
+            up = comparison > 0
+    if not up:
+        return kept
+
+    return _add(kept, [1])
+
+
+def _compare_numbers(number1: Number, number2: Number) -> int:
+    if number1.sign != number2.sign:
+        return number1.sign
+    if number1.limbs and number2.limbs:
+        # whichever starts in the higher place is bigger - no need to line up all the digits
+        top1 = _digit_count(number1.limbs) + number1.exponent
+        top2 = _digit_count(number2.limbs) + number2.exponent
+        if top1 != top2:
+            return (1 if top1 > top2 else -1) * number1.sign
+    a, b, _ = _aligned(number1, number2)
+    return _compare(a, b) * number1.sign
+
+
+def _aligned(number1: Number, number2: Number) -> tuple[list[int], list[int], int]:
+    # line up place values by scaling the coefficient with fewer decimal places
+    exponent = min(number1.exponent, number2.exponent)
+    a = _shift_left(number1.limbs, number1.exponent - exponent)
+    b = _shift_left(number2.limbs, number2.exponent - exponent)
+    return a, b, exponent
+
+
+def _without_zero_limbs(number: Number) -> Number:
+    # whole limbs of zeroes at the end moved into the exponent - just a slice, so it's cheap enough
+    # to do before every multiply and divide
+    zeros = 0
+    while zeros < len(number.limbs) and not number.limbs[zeros]:
+        zeros += 1
+    if not zeros:
+        return number
+    return Number(number.sign, number.limbs[zeros:], number.exponent + zeros * BASE_DIGITS)
+
+
+def to_number(value: 'str | Number') -> Number:
+    if isinstance(value, Number):
+        return value
+    return Number.from_string(value)
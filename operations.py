@@ -1,289 +1,533 @@
-'''Codifying the arithmetic we're taught at school
-We only work with single-digit integer values but we can add / subtract / multiply / divide and 
-logically work with the results e.g. we work out what 123.456 + 7.89 is by manipulating integers
-in sequence.
+'''Arithmetic on strings that represent numbers
+Inputs and outputs are strings, exactly as in schoolbook.py, but the work is done on the internal
+Number type (see number.py) so it only parses each input once. Number instances are accepted too,
+which lets chained calculations skip the string round-trip entirely.
 '''
 
-from utils import (
-    _add_ints,
-    _subtract_ints,
-    _multiply_ints,
-    _is_zero,
-    _clean_number,
-    _align_numbers,
-    _equivalent_division,
-    _lte,
-    _string_set,
+import os
+from collections.abc import Iterable, Sequence
+
+try:
+    import numpy
+except ImportError:  # optional - only used to speed up the batch operations
+    numpy = None
+
+from cache import LRUCache
+from context import Context, _checked, _current
+from division import DivisionDigits, DivisionState, multiples_cache, repeating_decimal
+from limbs import (
+    BASE_DIGITS,
+    KARATSUBA_THRESHOLD,
+    _carry_columns,
+    _divmod,
+    _divmod_small,
+    _multiply,
+    _shift_left,
+    _square,
+    _subtract,
 )
+from number import Number, _compare_numbers, to_number
+from utils import _check_numbers, _compare_strings
+
+
+# Results of add / subtract / multiply / divide, when turned on with enable_cache(). Entries are
+# keyed on the values of the operands, so "3" / "7" and "3.0" / "07" share an entry - plus anything
+# else that changes how the answer is written, like how many decimal places an addition keeps.
+operation_cache = LRUCache()
+
+
+def enable_cache(maxsize: int = 1024) -> None:
+    # cache up to maxsize results, and the multiples tables of up to maxsize divisors. Only
+    # divide_iter builds a multiples table - divide() goes through Number.divide, which doesn't use one
+    operation_cache.resize(maxsize)
+    multiples_cache.resize(maxsize)
+
+
+def disable_cache() -> None:
+    for cache in (operation_cache, multiples_cache):
+        cache.resize(0)
+        cache.clear()
 
 
 def add(
-    number1: str, 
-    number2: str, 
+    number1: str | Number,
+    number2: str | Number,
+    context: Context | None = None,
 ) -> str:
-    # handle negative inputs
-    if number1.startswith('-') and number2.startswith('-'):
-        # add the absolute values and negate the result
-        return f'-{add(number1[1:], number2[1:])}'
-    
-    elif number1.startswith('-'):  # -4 + 2 => 2 - 4
-        return subtract(number2, number1[1:])
-
-    elif number2.startswith('-'):  # -4 + 2 => 2 - 4
-        return subtract(number1, number2[1:])
-
-    # neither input is negative
-
-    v1, v2 = _align_numbers(number1, number2)
-
-    # This just applies add_int inside a loop and carries the 1 if necessary
-    carry = 0
-    output = ''
-    for i in range(len(v1) - 1, -1, -1):
-        if v1[i] == '.':
-            output = '.' + output
-            continue
-
-        int1 = int(v1[i])
-        int2 = int(v2[i])
-        result = _add_ints(int1, int2)
-        if carry:  # can only ever be 1 or 0?
-            result += carry
-
-        if result >= 10:
-            carry = 1
-            result -= 10
-        else:
-            carry = 0
-        
-        # pre-pend, not append, to the output
-        output = str(result) + output
-        
-    if carry:
-        return f'1{output}'
-    return output
+    number1, number2 = to_number(number1), to_number(number2)
+    context = _context(context)
+    if not operation_cache.maxsize:
+        return str((number1 + number2).rounded(context.precision, context.rounding))
+    # addition keeps the decimal places of both numbers, so they're part of the key
+    key = ('add', _cache_key(number1), _cache_key(number2), min(number1.exponent, number2.exponent), context)
+    return operation_cache.get(key, lambda: str((number1 + number2).rounded(context.precision, context.rounding)))
 
 
 def subtract(
-    number1: str, 
-    number2: str, 
+    number1: str | Number,
+    number2: str | Number,
+    context: Context | None = None,
 ) -> str:
-    # handle negative inputs
-    if number1.startswith('-') and number2.startswith('-'):            
-        result = subtract(number1[1:], number2[1:])
-        if result.startswith('-'):
-            # if we subtract a bigger negative from a smaller negative, we get a positive result
-            return result[1:]
-        return f'-{result}'
-
-    elif number1.startswith('-'):  # -4 - 2 => -(4 + 2)
-        return f'-{add(number1[1:], number2)}'
-    elif number2.startswith('-'): # 4 - -2 => 4 + 2
-        return add(number1, number2[1:])
-
-    # neither input is negative
-
-    v1, v2 = _align_numbers(number1, number2)
-
-    # both numbers are aligned - easy to see which is bigger. String sorting even makes this possible
-    negative = None
-    for int1, int2 in zip(v1, v2):
-        if int1 == int2:
-            continue
-        elif int1 > int2:
-            negative = False
-        else:
-            negative = True
-        break
-    
-    # numbers are identical
-    if negative is None:
-        return '0'
-    elif negative:
-        # swap the numbers so we can do the subtraction
-        v1, v2 = v2, v1
-
-    output = ''
-    for i in range(len(v1)-1, -1, -1):
-        if v1[i] == '.':
-            output = '.' + output
-            continue
-
-        int1 = int(v1[i])
-        int2 = int(v2[i])
-        result = _subtract_ints(int1, int2)
-        if result < 0:
-            # we need to borrow from higher value places
-            # we know a higher value place exists because the values aren't equal 
-            # and we know v1 > v2
-            for j in range(i-1, -1, -1):
-                if v1[j] == '.':
-                    continue
-                elif v1[j] == '0':
-                    v1 = _string_set(v1, j, 9)
-                else:
-                    v1 = _string_set(v1, j, int(v1[j]) - 1)
-                    result += 10  # 3 - 6 = -3, but 13 - 6 = 7 => result += 10
-                    break
-        
-        # pre-pend, not append, to the output
-        output = str(result) + output
-        
-    # strip any leading / trailing zeros?
-    output = _clean_number(output)
-    if negative:
-        output = '-' + output
-    return output
+    number1, number2 = to_number(number1), to_number(number2)
+    context = _context(context)
+    if not operation_cache.maxsize:
+        return str((number1 - number2).rounded(context.precision, context.rounding))
+    key = ('subtract', _cache_key(number1), _cache_key(number2), min(number1.exponent, number2.exponent), context)
+    return operation_cache.get(key, lambda: str((number1 - number2).rounded(context.precision, context.rounding)))
 
 
 def multiply(
-    number1: str, 
-    number2: str, 
+    number1: str | Number,
+    number2: str | Number,
+    context: Context | None = None,
 ) -> str:
-    # handle negative inputs
-    if number1.startswith('-') and number2.startswith('-'):            
-        return multiply(number1[1:], number2[1:])
-    elif number1.startswith('-'):
-        return f'-{multiply(number1[1:], number2)}'
-    elif number2.startswith('-'):
-        return f'-{multiply(number1, number2[1:])}'
-
-    # neither input is negative
-
-    # save ourselves some CPU cycles
-    if _is_zero(number1) or _is_zero(number2):
-        return '0'
+    if isinstance(number1, str) and number1 == number2:
+        # the same number twice - parse it once, so Number can see it's a square
+        number1 = number2 = to_number(number1)
+    else:
+        number1, number2 = to_number(number1), to_number(number2)
+    context = _context(context)
+    if not operation_cache.maxsize:
+        return str((number1 * number2).rounded(context.precision, context.rounding))
+    key = ('multiply', _cache_key(number1), _cache_key(number2), context)
+    return operation_cache.get(key, lambda: str((number1 * number2).rounded(context.precision, context.rounding)))
+
 
-    v1, v2 = _align_numbers(number1, number2)
-
-    # count all decimal places, then perform total integer multiplication, and re-add the 
-    # decimal place later
-    decimal_places = 0
-    if '.' in v1:
-        i, d = v1.split('.')
-        decimal_places += len(d)
-        v1 = v1.replace('.', '')
-    if '.' in v2:
-        i, d = v2.split('.')
-        decimal_places += len(d)
-        v2 = v2.replace('.', '')
-
-    numbers = []  # as we multiply, we end up with a bunch of numbers to be added together
-    # start at right-most value of v2, multiply by each digit of v1
-    padding = 0
-    for i in range(len(v2)-1, -1, -1):
-        int2 = int(v2[i])
-
-        # when multiplying, need to pad the right-hand side with zeros 
-        # i.e. we are multiplying by 30, not 3 -> pad the right
-        output = '0' * padding
-        carry = 0
-        for j in range(len(v1)-1, -1, -1):
-            int1 = int(v1[j])
-            result = _multiply_ints(int1, int2)
-            result = add(str(result), str(carry))
-
-            if len(result) > 1:
-                # can only be max 2-digits. Even if we are multiplying 9999 * 9999, then max of
-                # and operation will be 81 + 8 => 89 i.e. still 2 digits
-                carry = int(result[0])
-                result = result[1]
-            else:
-                carry = 0
-        
-            # pre-pend, not append, to the output
-            output = str(result) + output
-        
-        # inner loop has finished - add to numbers and perform next loop
-        if carry:
-            output = str(carry) + output
-        
-        numbers.append(output)
-        padding += 1
-
-    # All numbers have now been created -> sum them all up
-    total = '0'
+def divide(
+    number1: str | Number,
+    number2: str | Number,
+    max_decimals: int = 10,
+    context: Context | None = None,
+    repeating: bool = False,
+) -> str:
+    # with repeating=True, an answer whose decimals start repeating within max_decimals places is
+    # written exactly instead, with the repeating part in brackets: divide("1", "6", repeating=True)
+    # is "0.1(6)". Those answers aren't rounded, as there's nothing to round.
+    dividend, divisor = to_number(number1), to_number(number2)
+    context = _context(context)
+    if not operation_cache.maxsize:
+        return _divide_string(dividend, divisor, max_decimals, context, repeating)
+    key = (
+        'divide', _cache_key(dividend), _cache_key(divisor), _divide_decimals(dividend, divisor, max_decimals), context,
+        repeating,
+    )
+    return operation_cache.get(key, lambda: _divide_string(dividend, divisor, max_decimals, context, repeating))
+
+
+def _divide_string(dividend: Number, divisor: Number, max_decimals: int, context: Context, repeating: bool) -> str:
+    if repeating:
+        if divisor.is_zero():
+            raise ZeroDivisionError()
+        exact = repeating_decimal(dividend, divisor, _divide_decimals(dividend, divisor, max_decimals))
+        if exact is not None and exact.endswith(')'):
+            return exact
+    return str(_divide(dividend, divisor, max_decimals, context))
+
+
+def power(
+    base: str | Number,
+    exponent: int,
+    max_decimals: int | None = None,
+    context: Context | None = None,
+) -> str:
+    # base ** exponent for a whole exponent. With max_decimals, the answer is cut down to that many
+    # decimal places (rounded as the context says). A negative exponent is 1 / base ** -exponent,
+    # worked out exactly and then divided just once, to max_decimals (10 if not given) like divide()
+    base = to_number(base)
+    context = _context(context)
+    if exponent < 0:
+        return str(_divide(Number(1, [1]), base.power(-exponent), 10 if max_decimals is None else max_decimals, context))
+    result = base.power(exponent)
+    if max_decimals is not None:
+        return str(result.divide(Number(1, [1]), max_decimals, context.rounding, context.precision))
+    return str(result.rounded(context.precision, context.rounding))
+
+
+def power_mod(
+    base: str | Number,
+    exponent: str | Number | int,
+    modulus: str | Number,
+) -> str:
+    # base ** exponent % modulus for whole numbers, like Python's pow(base, exponent, modulus) with a
+    # positive modulus - the answer is between 0 and modulus - 1. Squares and multiplies like
+    # Number.power, but takes the remainder after every step so nothing gets bigger than modulus^2
+    base, modulus = to_number(base), to_number(modulus)
+    exponent = to_number(str(exponent) if isinstance(exponent, int) else exponent)
+    for name, number in (('base', base), ('exponent', exponent), ('modulus', modulus)):
+        if number.normalized().exponent < 0:
+            raise ValueError(f"power_mod works on whole numbers, but the {name} is {number}")
+    if exponent.sign < 0:
+        raise ValueError(f"Exponent must be >= 0, not {exponent}")
+    if modulus.sign < 0 or modulus.is_zero():
+        raise ValueError(f"Modulus must be at least 1, not {modulus}")
+
+    divisor = _whole_limbs(modulus)
+    remainder = _divmod(_whole_limbs(base), divisor)[1]
+    if base.sign < 0 and remainder:
+        remainder = _subtract(divisor, remainder)
+    result = _divmod([1], divisor)[1]
+    for bit in _binary(_whole_limbs(exponent)):
+        result = _divmod(_square(result), divisor)[1]
+        if bit == '1':
+            result = _divmod(_multiply(result, remainder), divisor)[1]
+    return str(Number(1, result))
+
+
+def _whole_limbs(number: Number) -> list[int]:
+    number = number.normalized()
+    return _shift_left(number.limbs, number.exponent)
+
+
+def _binary(limbs: list[int]) -> str:
+    # the bits of a magnitude, most significant first - 29 at a time, as 2^29 fits in a limb
+    chunks = []
+    while limbs:
+        limbs, chunk = _divmod_small(limbs, 1 << 29)
+        chunks.append(chunk)
+    return ''.join(f'{chunk:029b}' for chunk in reversed(chunks)).lstrip('0')
+
+
+def sum_numbers(
+    numbers: Iterable[str | Number],
+    context: Context | None = None,
+) -> str:
+    # the total of any number of numbers, written like add() would write it. Rather than adding
+    # them one at a time, each one's limbs go into running totals per column - the positive and
+    # negative numbers separately - and the carrying is done once at the end. `numbers` is only
+    # read once, so it can be a generator.
+    context = _context(context)
+    columns = {1: [], -1: []}
+    signs = set()
+    exponent = None
     for number in numbers:
-        total = add(total, number)
+        number = to_number(number)
+        signs.add(number.sign)
+        if exponent is None:
+            exponent = number.exponent
+        elif number.exponent < exponent:
+            # more decimal places than so far - line the totals up with them
+            for totals in columns.values():
+                _scale_columns(totals, exponent - number.exponent)
+            exponent = number.exponent
+
+        limbs = _shift_left(number.limbs, number.exponent - exponent)
+        totals = columns[number.sign]
+        if len(totals) < len(limbs):
+            totals.extend([0] * (len(limbs) - len(totals)))
+        for i, limb in enumerate(limbs):
+            totals[i] += limb
+
+    if exponent is None:
+        return '0'
+    positive = Number(1, _carry_columns(columns[1]), exponent)
+    negative = Number(-1, _carry_columns(columns[-1]), exponent)
+    if len(signs) == 1:
+        # like add(), a sum of numbers of the same sign keeps every decimal place
+        total = positive if 1 in signs else negative
+    else:
+        total = positive + negative
+    return str(total.rounded(context.precision, context.rounding))
 
-    # re-add the decimal place
-    if decimal_places > 0:
-        integer = total[:-decimal_places]
-        decimal = total[-decimal_places:]
-        total = f'{integer}.{decimal}'
 
-    total = _clean_number(total)
-    return total
-    
+def _scale_columns(columns: list[int], places: int) -> None:
+    # multiply the column totals by 10 ** places, in place
+    whole, part = divmod(places, BASE_DIGITS)
+    if part:
+        columns[:] = [column * 10 ** part for column in columns]
+    if columns:
+        columns[:0] = [0] * whole
 
-def divide(
-    number1: str, 
-    number2: str, 
+
+def _context(context: Context | None) -> Context:
+    # the one passed in, or else the current one from context.py
+    if context is None:
+        return _current.get()
+    return _checked(context)
+
+
+def _divide(dividend: Number, divisor: Number, max_decimals: int, context: Context | None = None) -> Number:
+    context = _context(context)
+    decimals = _divide_decimals(dividend, divisor, max_decimals)
+    return dividend.divide(divisor, decimals, context.rounding, context.precision)
+
+
+def _divide_decimals(dividend: Number, divisor: Number, max_decimals: int) -> int:
+    # long division always works through at least one decimal place, and when dividing by an
+    # integer it works through every decimal place of the dividend before it considers stopping
+    max_decimals = max(max_decimals, 1)
+    if divisor.exponent >= 0:
+        max_decimals = max(max_decimals, -dividend.exponent)
+    return max_decimals
+
+
+def _cache_key(number: Number) -> tuple:
+    number = number.stripped()
+    return number.sign, tuple(number.limbs), number.exponent
+
+
+def sqrt(
+    number: str | Number,
     max_decimals: int = 10,
 ) -> str:
-    if _is_zero(number2):
-        raise ZeroDivisionError()
+    return str(to_number(number).sqrt(max_decimals))
 
-    # handle negative inputs
-    if number1.startswith('-') and number2.startswith('-'):            
-        return divide(number1[1:], number2[1:])
-    elif number1.startswith('-'):
-        return f'-{divide(number1[1:], number2)}'
-    elif number2.startswith('-'):
-        return f'-{divide(number1, number2[1:])}'
 
-    # neither input is negative
+def scientific(number: str | Number) -> str:
+    # the same number in scientific notation - "0.00015" is "1.5e-4". Every operation reads this
+    # form too, but always answers in plain decimals.
+    return to_number(number).scientific()
 
-    # save ourselves some CPU cycles
-    if _is_zero(number1):
-        return '0'
-    
-    v1, v2 = _equivalent_division(number1, number2)
-    if '.' not in v1:
-        v1 = f'{v1}.0'  # ensure we always have a decimal so no special case handling
-
-    # I always used to do multiplication 1-9 of the divisor, and then just look up the biggest 
-    # one that fits...
-    lookup = {i: multiply(v2, str(i)) for i in range(0, 10)}
-
-    output = ''
-    value = ''
-    decimal = False
-    n_decimals = 0
-    i = 0
-    while True:
-        # Can't think of the requisite logic for a single conditional
-        # we msut run until at least len(v1), and if we have a remainder at that point, we keep 
-        # going until we exceed max_decimals
-        if i >= len(v1) and n_decimals >= max_decimals:
-            break
-
-        if i < len(v1):
-            if v1[i] == '.':
-                output += '.'
-                decimal = True
-                i += 1
-                continue
-
-            value = f'{value}{v1[i]}'
+
+def compare(
+    number1: str | Number,
+    number2: str | Number,
+) -> int:
+    # -1, 0 or 1 as number1 is less than, equal to or greater than number2. Two plain strings are
+    # compared where they stand - no parsing, and it stops at the first digit that differs
+    if isinstance(number1, str) and isinstance(number2, str) and not _scientific(number1, number2):
+        _check_numbers(number1, number2)
+        return _compare_strings(number1, number2)
+    return _compare_numbers(to_number(number1), to_number(number2))
+
+
+def _scientific(*numbers: str) -> bool:
+    return any('e' in number or 'E' in number for number in numbers)
+
+
+def lt(number1: str | Number, number2: str | Number) -> bool:
+    return compare(number1, number2) < 0
+
+
+def le(number1: str | Number, number2: str | Number) -> bool:
+    return compare(number1, number2) <= 0
+
+
+def eq(number1: str | Number, number2: str | Number) -> bool:
+    return compare(number1, number2) == 0
+
+
+def gt(number1: str | Number, number2: str | Number) -> bool:
+    return compare(number1, number2) > 0
+
+
+def ge(number1: str | Number, number2: str | Number) -> bool:
+    return compare(number1, number2) >= 0
+
+
+def sum_of_squares_lt_one(
+    number1: str | Number,
+    number2: str | Number,
+) -> bool:
+    # exactly whether number1^2 + number2^2 < 1. Usually the first few decimal places are enough to
+    # tell, so it only multiplies everything out when the point is very close to the unit circle.
+    if isinstance(number1, Number) or isinstance(number2, Number):
+        return _sum_of_squares_lt_one(to_number(number1), to_number(number2))
+
+    decimals = []
+    for number in (number1, number2):
+        integer, _, decimal = number.removeprefix('-').partition('.')
+        if not f'{integer}{decimal}'.isdigit():
+            # scientific notation (or not a number at all, which raises the usual error)
+            return _sum_of_squares_lt_one(Number.from_string(number1), Number.from_string(number2))
+        if integer.strip('0'):
+            # a number >= 1 squares to >= 1 all on its own
+            return False
+        decimals.append(decimal)
+
+    decimal1, decimal2 = decimals
+    for places in (2, 4, 9):
+        # with only the first few places, each number lies in [leading, leading + 1) x 10^-places,
+        # so its square lies between the squares of those two ends
+        leading1, exact1 = int(decimal1[:places].ljust(places, '0')), not decimal1[places:].strip('0')
+        leading2, exact2 = int(decimal2[:places].ljust(places, '0')), not decimal2[places:].strip('0')
+        one = 10 ** (2 * places)
+
+        lowest = leading1 * leading1 + leading2 * leading2
+        if lowest >= one:
+            return False
+        if exact1 and exact2:
+            return True
+        highest = (leading1 + (not exact1)) ** 2 + (leading2 + (not exact2)) ** 2
+        if highest <= one:
+            return True
+
+    return _sum_of_squares_lt_one(Number.from_string(number1), Number.from_string(number2))
+
+
+def _sum_of_squares_lt_one(number1: Number, number2: Number) -> bool:
+    return number1 * number1 + number2 * number2 < Number(1, [1])
+
+
+def divide_iter(
+    number1: str | Number | None = None,
+    number2: str | Number | None = None,
+    state: DivisionState | None = None,
+) -> DivisionDigits:
+    # the characters of number1 / number2, one at a time, for as long as the caller wants them.
+    # Pass the .state of a previous iterator instead of the numbers to carry on where it stopped.
+    if state is not None:
+        return DivisionDigits(state)
+    return DivisionDigits.start(to_number(number1), to_number(number2))
+
+
+# Batch versions - the same operations applied pair-wise to two sequences of numbers. When numpy is
+# installed and the operands are all short, similar-length, non-negative strings, they're lined up
+# in a grid of digits and each column is processed for the whole batch at once; otherwise it's one
+# pair at a time.
+
+BATCH_MAX_DIGITS = 9 * KARATSUBA_THRESHOLD  # longer than this and the pair-wise operations are quicker
+
+def add_many(
+    numbers1: Sequence[str | Number],
+    numbers2: Sequence[str | Number],
+) -> list[str]:
+    _check_batch(numbers1, numbers2)
+    shape = _batch_shape(numbers1, numbers2)
+    if shape is None:
+        return [add(number1, number2) for number1, number2 in zip(numbers1, numbers2)]
+
+    width, decimals = shape
+    digits1 = _digit_matrix(numbers1, width + 1, decimals)
+    digits2 = _digit_matrix(numbers2, width + 1, decimals)
+    output = _propagate_carries(digits1 + digits2)
+
+    # addition keeps as many decimal places as the longer of each pair, zeroes and all
+    kept = [
+        max(len(number1.partition('.')[2]), len(number2.partition('.')[2]))
+        for number1, number2 in zip(numbers1, numbers2)
+    ]
+    return _format_rows(output, decimals, kept)
+
+
+def subtract_many(
+    numbers1: Sequence[str | Number],
+    numbers2: Sequence[str | Number],
+) -> list[str]:
+    _check_batch(numbers1, numbers2)
+    shape = _batch_shape(numbers1, numbers2)
+    if shape is None:
+        return [subtract(number1, number2) for number1, number2 in zip(numbers1, numbers2)]
+
+    width, decimals = shape
+    digits1 = _digit_matrix(numbers1, width, decimals)
+    digits2 = _digit_matrix(numbers2, width, decimals)
+
+    # wherever number2 is bigger, swap the pair round and remember to negate the answer
+    negative = _rows_less_than(digits1, digits2)
+    bigger = numpy.where(negative[:, None], digits2, digits1)
+    smaller = numpy.where(negative[:, None], digits1, digits2)
+    output = _propagate_carries(bigger - smaller)
+    rows = _format_rows(output, decimals)
+    return [f'-{row}' if is_negative and row != '0' else row for row, is_negative in zip(rows, negative)]
+
+
+def multiply_many(
+    numbers1: Sequence[str | Number],
+    numbers2: Sequence[str | Number],
+) -> list[str]:
+    _check_batch(numbers1, numbers2)
+    shape = _batch_shape(numbers1, numbers2)
+    if shape is None:
+        return [multiply(number1, number2) for number1, number2 in zip(numbers1, numbers2)]
+
+    width, decimals = shape
+    digits1 = _digit_matrix(numbers1, width, decimals)
+    digits2 = _digit_matrix(numbers2, width, decimals)
+
+    # long multiplication, one row of partial products per digit of number1 - but each row is
+    # worked out for every pair in the batch in one go
+    length = digits1.shape[1]
+    products = numpy.zeros((digits1.shape[0], 2 * length), dtype=numpy.int64)
+    for i in range(length):
+        products[:, i + 1:i + 1 + length] += digits1[:, i:i + 1] * digits2
+    output = _propagate_carries(products)
+    return _format_rows(output, 2 * decimals)
+
+
+def divide_many(
+    numbers1: Sequence[str | Number],
+    numbers2: Sequence[str | Number],
+    max_decimals: int = 10,
+) -> list[str]:
+    # long division picks each digit by trial and error, which doesn't line up column-by-column
+    # across a batch, so this is always one pair at a time
+    _check_batch(numbers1, numbers2)
+    return [divide(number1, number2, max_decimals) for number1, number2 in zip(numbers1, numbers2)]
+
+
+def _check_batch(numbers1: Sequence, numbers2: Sequence) -> None:
+    if len(numbers1) != len(numbers2):
+        raise ValueError(f"Batches must be the same length ({len(numbers1)} != {len(numbers2)})")
+
+
+def _batch_shape(numbers1: Sequence, numbers2: Sequence) -> tuple[int, int] | None:
+    # (widest integer part, most decimals) if the batch can be done column-wise, else None
+    if numpy is None or not numbers1:
+        return None
+
+    width, decimals, total = 0, 0, 0
+    for number in (*numbers1, *numbers2):
+        if not isinstance(number, str) or not number.isascii():
+            return None
+        integer, _, decimal = number.partition('.')
+        if not (integer or decimal) or not f'{integer}{decimal}'.isdigit():
+            return None
+        width = max(width, len(integer))
+        decimals = max(decimals, len(decimal))
+        total += len(integer) + len(decimal)
+
+    # every row is padded out to the longest number, and multiplying a grid takes length^2 steps
+    # rather than going through Karatsuba - so only short numbers of similar lengths are worth it.
+    # "Similar" allows each row up to twice its real digits, plus a little for very short numbers.
+    length = width + decimals
+    padded = 2 * len(numbers1) * length
+    if length > BATCH_MAX_DIGITS or padded > 2 * total + 32 * len(numbers1):
+        return None
+    return width, decimals
+
+
+def _digit_matrix(numbers: Sequence[str], width: int, decimals: int) -> 'numpy.ndarray':
+    # one row per number, one column per digit, with integer parts right-aligned to `width`
+    parts = (number.partition('.') for number in numbers)
+    rows = ''.join(f"{integer.rjust(width, '0')}{decimal.ljust(decimals, '0')}" for integer, _, decimal in parts)
+    digits = numpy.frombuffer(rows.encode('ascii'), dtype=numpy.uint8).astype(numpy.int64) - ord('0')
+    return digits.reshape(len(numbers), width + decimals)
+
+
+def _propagate_carries(columns: 'numpy.ndarray') -> 'numpy.ndarray':
+    # work right-to-left, carrying (or borrowing) into the next column for all rows at once
+    columns = columns.copy()
+    for i in range(columns.shape[1] - 1, 0, -1):
+        carry = columns[:, i] // 10  # floor division, so a negative column borrows
+        columns[:, i] -= carry * 10
+        columns[:, i - 1] += carry
+    return columns
+
+
+def _rows_less_than(digits1: 'numpy.ndarray', digits2: 'numpy.ndarray') -> 'numpy.ndarray':
+    # the first column where the rows differ decides which is smaller
+    difference = digits1 - digits2
+    differs = difference != 0
+    first = differs.argmax(axis=1)
+    return differs.any(axis=1) & (difference[numpy.arange(len(difference)), first] < 0)
+
+
+def _format_rows(digits: 'numpy.ndarray', decimals: int, kept: list[int] | None = None) -> list[str]:
+    # back to strings: either cleaned, or keeping exactly kept[i] decimal places on row i
+    length = digits.shape[1]
+    text = (digits.astype(numpy.uint8) + ord('0')).tobytes().decode('ascii')
+    output = []
+    for i, start in enumerate(range(0, len(text), length)):
+        row = text[start:start + length]
+        integer = row[:length - decimals].lstrip('0') or '0'
+        decimal = row[length - decimals:]
+        if kept is None:
+            decimal = decimal.rstrip('0')
         else:
-            value = f'{value}0'
-
-        # lookup goes down to 0 - so something will always fit
-        for j in range(9, -1, -1):
-            multiple = lookup[j]
-            if _lte(multiple, value):
-                output += str(j)
-                value = subtract(value, multiple)
-                if decimal:
-                    n_decimals += 1
-                break
-
-        # we have finished iterating over the number and we have no remainder -> finshed!
-        if i >= len(v1) and value == '0':
-            break
-        
-        i += 1
-
-    output = _clean_number(output)
+            decimal = decimal[:kept[i]]
+        output.append(f'{integer}.{decimal}' if decimal else integer)
     return output
+
+
+if os.environ.get('ALGORITHMETIC_PROFILE'):
+    import instrument  # profiles the whole program - see instrument.py
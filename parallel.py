@@ -0,0 +1,59 @@
+'''Multiplying huge numbers on several cores
+multiply() runs on one core. For numbers with hundreds of thousands of digits, multiply_parallel
+splits the longer number into a block per worker, multiplies each block by the other number in a
+ProcessPoolExecutor (as pi.py does for its chunks), and then adds the shifted block products up in
+a single pass over the columns. Below PARALLEL_THRESHOLD digits it's not worth sending the numbers
+to other processes, so it just calls multiply().
+
+    multiply_parallel(a, b, workers=4)
+
+Starting a pool takes a while, so for lots of calls pass an executor to share.
+'''
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
+
+from context import Context
+from limbs import BASE_DIGITS, _carry_columns, _multiply, _trim
+from number import Number, to_number
+from operations import _context, multiply
+
+
+# digits in the shorter number, below which multiply_parallel stays on this core
+PARALLEL_THRESHOLD = 50_000
+
+
+def multiply_parallel(
+    number1: str | Number,
+    number2: str | Number,
+    workers: int | None = None,
+    context: Context | None = None,
+    executor: Executor | None = None,
+) -> str:
+    # the same answer as multiply(number1, number2, context), using up to `workers` processes
+    # (default: one per core)
+    number1, number2 = to_number(number1), to_number(number2)
+    context = _context(context)
+    a, b = number1.limbs, number2.limbs
+    if len(a) < len(b):
+        a, b = b, a
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(b) * BASE_DIGITS < PARALLEL_THRESHOLD:
+        return multiply(number1, number2, context)
+
+    # one block of the longer number per worker - each block times the shorter number is a row
+    step = -(-len(a) // workers)
+    offsets = range(0, len(a), step)
+    blocks = [_trim(a[offset:offset + step]) for offset in offsets]
+    with nullcontext(executor) if executor is not None else ProcessPoolExecutor(workers) as pool:
+        rows = list(pool.map(_multiply, blocks, repeat(b)))
+
+    # add the rows into their columns, then carry once
+    columns = [0] * (len(a) + len(b))
+    for offset, row in zip(offsets, rows):
+        for i, limb in enumerate(row, offset):
+            columns[i] += limb
+    product = Number(number1.sign * number2.sign, _carry_columns(columns), number1.exponent + number2.exponent)
+    return str(product.normalized().rounded(context.precision, context.rounding))
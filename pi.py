@@ -2,77 +2,250 @@
 # Use a monte-carlo approach - generate two random numbers, work out their hypotenuse
 # if hyptoenuse > 1, counts as outside, otherwise is inside
 
+import argparse
+import json
 import math
-from concurrent.futures import ProcessPoolExecutor
-from random import choice
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import nullcontext
 
-from operations import multiply, add, divide, subtract
+from operations import add_many, multiply_many, sum_of_squares_lt_one
+from random_digits import RandomDigits
+from rational import Rational
 
 
-N = 1_000_000  # iterations for each worker
-N_WORKERS = 5
+ITERATIONS = 5_000_000  # total iterations across all workers
+CHUNK_SIZE = 100_000  # iterations handed to a worker at a time
 UPDATE_INTERVAL = 10_000  # how frequently to provide updates
 
 # length of random number
 RAND_LENGTH = 10
 
-# Pick up where we left off last time?
-STARTING_COUNT_INSIDE = 0
-STARTING_COUNT_OUTSIDE = 0
+# Pick up where we left off last time - counts so far are saved here every CHECKPOINT_INTERVAL seconds
+CHECKPOINT_PATH = 'pi_checkpoint.json'
+CHECKPOINT_INTERVAL = 30
 
 
-def rand(length: int = 10) -> str:
-    CHARS = '0123456789'
-    return f"0.{''.join(choice(CHARS) for _ in range(length))}"
+def rand_points(digits: RandomDigits, count: int, length: int = RAND_LENGTH) -> tuple[list[str], list[str]]:
+    # `count` random co-ordinates between 0 and 1, as x then y for each point
+    numbers = digits.numbers(2 * count, length)
+    return numbers[0::2], numbers[1::2]
 
 
-def run_batch(iterations: int, worker_id: int = -1) -> tuple[int, int]:
+def run_batch(
+    iterations: int,
+    worker_id: int = -1,
+    rand_length: int = RAND_LENGTH,
+    report: bool = True,
+    seed: int | str | None = None,
+    fast: bool = False,
+    skip: int = 0,
+) -> tuple[int, int]:
     # Runs a number of iterations and return the count of points found to be inside & outside
     # Splitting into separate func so we can multi-process
+    # Each worker_id gets its own stream of random digits from the seed, so the same seed and
+    # worker_id always give the same points - and fast mode gives exactly the same counts.
+    # `skip` passes over points that were already counted, e.g. to top up a chunk.
+    digits = RandomDigits.stream(seed, worker_id)
+    digits.skip(2 * skip * rand_length)
     count_inside, count_outside = 0, 0
-    for i in range(iterations):
-        x = rand(RAND_LENGTH)
-        y = rand(RAND_LENGTH)
-
-        # to keep precision, use string operations
-        x2 = multiply(x, x)
-        y2 = multiply(y, y)
-        hypotenuse = add(x2, y2)  # string
-
-        # If >= 1, it's outside
-        is_inside = hypotenuse[0] == '0'
-        if is_inside:
-            count_inside += 1
+    for start in range(0, iterations, UPDATE_INTERVAL):
+        size = min(UPDATE_INTERVAL, iterations - start)
+        xs, ys = rand_points(digits, size, rand_length)
+
+        if fast:
+            # exact too, but most points are settled from their first couple of decimal places
+            inside = sum(map(sum_of_squares_lt_one, xs, ys))
         else:
-            count_outside += 1
+            # to keep precision, use string operations - a whole block of points at a time
+            hypotenuses = add_many(multiply_many(xs, xs), multiply_many(ys, ys))
+
+            # If >= 1, it's outside
+            inside = sum(hypotenuse[0] == '0' for hypotenuse in hypotenuses)
+        count_inside += inside
+        count_outside += size - inside
 
-        if i % UPDATE_INTERVAL == 0:
-            pc = (i + 1) / iterations * 100
+        if report:
+            pc = (start + size) / iterations * 100
             print(f"Worker {worker_id}: {pc:.2f}% completed")
 
     return count_inside, count_outside
 
 
-if __name__ == '__main__':
-
-    counts = []
-    with ProcessPoolExecutor(max_workers=N_WORKERS) as executor:
-        futures = []
-        for worker_id in range(N_WORKERS):
-            futures.append(executor.submit(run_batch, N, worker_id))
+def load_checkpoint(path: str, rand_length: int, chunk_size: int, seed: int | None) -> tuple[int, int, dict[int, int]]:
+    # counts from a previous run, and how many points each chunk had done - or nothing if there isn't one
+    if not os.path.exists(path):
+        return 0, 0, {}
+    with open(path) as file:
+        checkpoint = json.load(file)
+    settings = {'rand_length': rand_length, 'chunk_size': chunk_size, 'seed': seed}
+    for name, value in settings.items():
+        # carrying on with different settings would mix up two different sets of points
+        if checkpoint.get(name) != value:
+            raise ValueError(
+                f"Checkpoint {path} was made with {name} = {checkpoint.get(name)}, not {value}. "
+                "Use --fresh to start again."
+            )
+    chunks = {int(chunk_id): size for chunk_id, size in checkpoint['chunks'].items()}
+    return checkpoint['inside'], checkpoint['outside'], chunks
+
+
+def save_checkpoint(
+    path: str,
+    rand_length: int,
+    chunk_size: int,
+    seed: int | None,
+    count_inside: int,
+    count_outside: int,
+    chunks: dict[int, int],
+) -> None:
+    # write to a temporary file first, so a crash mid-write can't leave a broken checkpoint
+    checkpoint = {
+        'inside': count_inside,
+        'outside': count_outside,
+        'chunks': {str(chunk_id): size for chunk_id, size in sorted(chunks.items())},
+        'rand_length': rand_length,
+        'chunk_size': chunk_size,
+        'seed': seed,
+    }
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(checkpoint, file)
+    os.replace(temporary, path)
+
+
+def run(
+    iterations: int,
+    workers: int,
+    chunk_size: int = CHUNK_SIZE,
+    rand_length: int = RAND_LENGTH,
+    checkpoint_path: str = CHECKPOINT_PATH,
+    checkpoint_interval: float = CHECKPOINT_INTERVAL,
+    seed: int | None = None,
+    fast: bool = False,
+) -> tuple[int, int]:
+    # Split the iterations into chunks and hand them out as workers become free, adding up the
+    # counts as they come back. Carries on from the checkpoint if there is one.
+    # Chunk n always draws its points from stream n of the seed, so a seeded run gives the same
+    # counts however many workers there are, and however many times it was stopped and resumed.
+    # If --iterations has gone up since the checkpoint, a short last chunk carries on from the
+    # points it already has, so the result matches a run that was this long from the start.
+    count_inside, count_outside, finished = load_checkpoint(checkpoint_path, rand_length, chunk_size, seed)
+    if finished:
+        print(f"Resuming from checkpoint: inside = {count_inside}, outside = {count_outside}")
+
+    # (chunk, points it still needs, points it already has)
+    chunks = []
+    for chunk_id, start in enumerate(range(0, iterations, chunk_size)):
+        size = min(chunk_size, iterations - start)
+        done = finished.get(chunk_id, 0)
+        if done < size:
+            chunks.append((chunk_id, size - done, done))
+    last_checkpoint = time.monotonic()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) if workers else _InProcess() as executor:
+            pending = {}
+
+            def collect(futures) -> None:
+                nonlocal count_inside, count_outside
+                for future in futures:
+                    inside, outside = future.result()
+                    count_inside += inside
+                    count_outside += outside
+                    chunk_id, size = pending.pop(future)
+                    finished[chunk_id] = finished.get(chunk_id, 0) + size
+
+            for chunk_id, size, done in chunks:
+                # only keep a couple of chunks queued per worker, so results arrive steadily
+                if len(pending) >= 2 * max(workers, 1):
+                    collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                future = executor.submit(run_batch, size, chunk_id, rand_length, False, seed, fast, done)
+                pending[future] = chunk_id, size
+
+                if time.monotonic() - last_checkpoint >= checkpoint_interval:
+                    save_checkpoint(checkpoint_path, rand_length, chunk_size, seed, count_inside, count_outside, finished)
+                    last_checkpoint = time.monotonic()
+                    pc = (count_inside + count_outside) / iterations * 100
+                    print(f"{pc:.2f}% completed: inside = {count_inside}, outside = {count_outside}")
+
+            collect(wait(pending).done)
+    finally:
+        # whatever happens, keep the counts we've got so far
+        save_checkpoint(checkpoint_path, rand_length, chunk_size, seed, count_inside, count_outside, finished)
 
-        for future in futures:
-            count_inside, count_outside = future.result()
-            counts.append((count_inside, count_outside))
-            print(f"Batch result: inside = {count_inside}, outside = {count_outside}")
+    return count_inside, count_outside
 
-    total_count_inside = sum(count[0] for count in counts) + STARTING_COUNT_INSIDE
-    total_count_outside = sum(count[1] for count in counts) + STARTING_COUNT_OUTSIDE
 
-    pi_estimate = multiply(divide(str(total_count_inside), add(str(total_count_inside), str(total_count_outside))), str(4))
-    accuracy = multiply(divide(subtract(pi_estimate, str(math.pi)), str(math.pi)), str(100))
+class _InProcess:
+    # stands in for the ProcessPoolExecutor when workers=0 - each job is run as it's submitted, in
+    # this process, e.g. so a profile can see the calls
+    def __enter__(self) -> '_InProcess':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def submit(self, function, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _positive(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Estimate pi with a Monte Carlo simulation")
+    parser.add_argument('--iterations', type=int, default=ITERATIONS, help="total points, including any from the checkpoint")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="0 runs everything in this process")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="points per job handed to a worker")
+    parser.add_argument('--rand-length', type=_positive, default=RAND_LENGTH, help="decimal places in each co-ordinate")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH, help="file to save progress to and resume from")
+    parser.add_argument('--checkpoint-interval', type=float, default=CHECKPOINT_INTERVAL, help="seconds between checkpoints")
+    parser.add_argument('--fresh', action='store_true', help="ignore any existing checkpoint")
+    parser.add_argument('--seed', type=int, default=None, help="seed the random points, for a reproducible run")
+    parser.add_argument('--fast', action='store_true', help="use the fast inside-the-circle test (same counts)")
+    parser.add_argument('--profile', metavar='TRACE', help="profile the run in this process and write a Chrome trace here")
+    args = parser.parse_args(argv)
+
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    if args.profile:
+        # the workers are other processes, so their calls wouldn't show up
+        import instrument
+
+        profiling, args.workers = instrument.profile(), 0
+    else:
+        profiling = nullcontext()
+    with profiling as profile:
+        total_count_inside, total_count_outside = run(
+            args.iterations, args.workers, args.chunk_size, args.rand_length, args.checkpoint, args.checkpoint_interval,
+            args.seed, args.fast,
+        )
+    if profile is not None:
+        print(profile.summary())
+        profile.write_trace(args.profile)
+        print(f"Trace written to {args.profile}")
+
+    # kept as exact fractions, so the only rounding is in the final to_decimal()
+    estimate = Rational(str(total_count_inside), str(total_count_inside + total_count_outside)) * '4'
+    pi_estimate = estimate.to_decimal()
+    accuracy = ((estimate - str(math.pi)) / str(math.pi) * '100').to_decimal()
 
     print(f"Estimated value of pi: {pi_estimate}")
     print(f"Pythonic  value of pi: {math.pi}")
     print(f"Accuracy: {accuracy} %")
     print(f"Final counts: inside = {total_count_inside}, outside = {total_count_outside}")
+
+
+if __name__ == '__main__':
+    main()
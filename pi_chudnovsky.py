@@ -0,0 +1,66 @@
+# calculate pi to a given number of decimal places with the algorithmetic methods
+# Uses the Chudnovsky series, where each term adds ~14 correct digits:
+#   1 / pi = 12 * sum_k (-1)^k (6k)! (13591409 + 545140134k) / ((3k)! (k!)^3 640320^(3k + 3/2))
+# The terms are combined with "binary splitting", so most of the work is a handful of
+# multiplications of very long numbers rather than lots of divisions.
+#
+# Run with: python pi_chudnovsky.py 1000
+
+import argparse
+import time
+
+from number import Number
+
+
+DIGITS_PER_TERM = 14
+GUARD_DIGITS = 10  # extra decimals carried through so the truncated answer is still right
+
+
+def _number(value: int) -> Number:
+    return Number.from_string(str(value))
+
+
+def _split(a: int, b: int) -> tuple[Number, Number, Number]:
+    # P, Q and T for terms a up to (but not including) b
+    if b - a == 1:
+        if a == 0:
+            p = q = _number(1)
+        else:
+            p = _number(6 * a - 5) * _number(2 * a - 1) * _number(6 * a - 1)
+            q = _number(a) * _number(a) * _number(a) * _number(640320 ** 3 // 24)
+        t = p * _number(13591409 + 545140134 * a)
+        if a % 2:
+            t = -t
+        return p, q, t
+
+    middle = (a + b) // 2
+    p1, q1, t1 = _split(a, middle)
+    p2, q2, t2 = _split(middle, b)
+    return p1 * p2, q1 * q2, q2 * t1 + p1 * t2
+
+
+def calculate_pi(digits: int) -> str:
+    # pi truncated to `digits` decimal places
+    terms = digits // DIGITS_PER_TERM + 1
+    _, q, t = _split(0, terms)
+
+    decimals = digits + GUARD_DIGITS
+    root = _number(10005).sqrt(decimals)
+    pi = (q * _number(426880) * root).divide(t, decimals)
+
+    # chop off the guard digits
+    integer, _, decimal = str(pi).partition('.')
+    return f"{integer}.{decimal[:digits].ljust(digits, '0')}" if digits else integer
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Calculate pi with the Chudnovsky series")
+    parser.add_argument('digits', type=int, nargs='?', default=1000, help="decimal places to calculate")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pi = calculate_pi(args.digits)
+    elapsed = time.perf_counter() - start
+
+    print(pi)
+    print(f"Calculated {args.digits} decimal places in {elapsed:.2f}s")
@@ -0,0 +1,72 @@
+'''Random decimal digits, drawn in bulk
+Picking digits one at a time with random.choice costs a Python call per digit. Instead, this draws a
+whole block at once as a single random integer below 10^BLOCK_DIGITS (so every digit is equally
+likely) and hands out slices of its decimal string.
+
+The digits only depend on the seed - not on how many are taken at a time - so a seeded run can be
+repeated exactly. stream() gives each worker its own independent sequence from one seed.
+'''
+
+import random
+
+
+BLOCK_DIGITS = 1_000  # digits per draw - bigger blocks are slower to turn into strings
+
+
+class RandomDigits:
+    # iterator over random digits '0'-'9', refilled a block at a time
+    __slots__ = ('_rng', '_buffer', '_position')
+
+    def __init__(self, seed: int | str | None = None):
+        # no seed means a different sequence every time
+        self._rng = random.Random(seed)
+        self._buffer = ''
+        self._position = 0
+
+    @classmethod
+    def stream(cls, seed: int | str | None, stream_id: int) -> 'RandomDigits':
+        # the digits for one worker / chunk of work - different ids never share a sequence
+        return cls(None if seed is None else f'{seed}:{stream_id}')
+
+    def __iter__(self) -> 'RandomDigits':
+        return self
+
+    def __next__(self) -> str:
+        return self.take(1)
+
+    def take(self, count: int) -> str:
+        # the next `count` digits
+        parts = []
+        while count > 0:
+            if self._position == len(self._buffer):
+                self._refill()
+            part = self._buffer[self._position:self._position + count]
+            self._position += len(part)
+            count -= len(part)
+            parts.append(part)
+        return ''.join(parts)
+
+    def skip(self, count: int) -> None:
+        # move past the next `count` digits, as if they'd been taken
+        while count > 0:
+            if self._position == len(self._buffer):
+                if count >= BLOCK_DIGITS:
+                    # a whole block that would only be thrown away - no need to write it out
+                    self._rng.randrange(10 ** BLOCK_DIGITS)
+                    count -= BLOCK_DIGITS
+                    continue
+                self._refill()
+            skipped = min(count, len(self._buffer) - self._position)
+            self._position += skipped
+            count -= skipped
+
+    def numbers(self, count: int, length: int) -> list[str]:
+        # `count` random numbers between 0 and 1, each with `length` decimal places
+        if length < 1:
+            raise ValueError(f"Numbers need at least one decimal place, not {length}")
+        digits = self.take(count * length)
+        return [f"0.{digits[i:i + length]}" for i in range(0, len(digits), length)]
+
+    def _refill(self) -> None:
+        self._buffer = f'{self._rng.randrange(10 ** BLOCK_DIGITS):0{BLOCK_DIGITS}d}'
+        self._position = 0
@@ -0,0 +1,146 @@
+'''Exact fractions
+Dividing is the one operation that has to stop somewhere (at max_decimals), and it's also the slowest.
+A Rational keeps a numerator and denominator instead, so a / b * b is exactly a again - and only
+turns into a decimal, with a single divide(), when to_decimal() is called:
+
+    ratio = Rational("7853471", "10000000") * Rational("4")
+    ratio.to_decimal(10)  # "3.1413884"
+
+Numerators and denominators are whole Numbers, always kept in lowest terms (the gcd is taken out
+with the same limb arithmetic as everything else) with the sign on the numerator.
+'''
+
+from limbs import _compare, _divmod, _gcd, _shift_left
+from number import Number, to_number
+from operations import _whole_limbs, divide
+
+
+class Rational:
+    __slots__ = ('numerator', 'denominator')
+
+    def __init__(self, numerator: 'str | Number | Rational', denominator: 'str | Number | Rational' = '1'):
+        # either part can be a decimal (or a Rational) - "0.25" / "1" is stored as 1 / 4
+        numerator, denominator = _as_fraction(numerator), _as_fraction(denominator)
+        if denominator[0].is_zero():
+            raise ZeroDivisionError()
+        # (a / b) / (c / d) = (a * d) / (b * c)
+        numerator, denominator = numerator[0] * denominator[1], numerator[1] * denominator[0]
+        sign = numerator.sign * denominator.sign
+        # the products can keep zeroes at the end in their exponents, so put them back first
+        self.numerator, self.denominator = _lowest_terms(sign, _whole_limbs(numerator), _whole_limbs(denominator))
+
+    @classmethod
+    def from_string(cls, value: str) -> 'Rational':
+        # "3/4", "-0.75" or "3"
+        numerator, slash, denominator = value.partition('/')
+        if slash:
+            return cls(numerator.strip(), denominator.strip())
+        return cls(value)
+
+    def __str__(self) -> str:
+        if self.denominator == _ONE:
+            return str(self.numerator)
+        return f'{self.numerator}/{self.denominator}'
+
+    def __repr__(self) -> str:
+        return f"Rational('{self}')"
+
+    def to_decimal(self, max_decimals: int = 10) -> str:
+        # the only place this divides - truncated to max_decimals (or as the current context says)
+        if self.denominator == _ONE:
+            return str(self.numerator)
+        return divide(self.numerator, self.denominator, max_decimals)
+
+    def __neg__(self) -> 'Rational':
+        return _rational(-self.numerator, self.denominator)
+
+    def __abs__(self) -> 'Rational':
+        return _rational(abs(self.numerator), self.denominator)
+
+    def __add__(self, other: 'str | Number | Rational') -> 'Rational':
+        other = _as_rational(other)
+        return Rational(
+            self.numerator * other.denominator + other.numerator * self.denominator,
+            self.denominator * other.denominator,
+        )
+
+    def __sub__(self, other: 'str | Number | Rational') -> 'Rational':
+        return self + -_as_rational(other)
+
+    def __mul__(self, other: 'str | Number | Rational') -> 'Rational':
+        other = _as_rational(other)
+        return Rational(self.numerator * other.numerator, self.denominator * other.denominator)
+
+    def __truediv__(self, other: 'str | Number | Rational') -> 'Rational':
+        other = _as_rational(other)
+        return Rational(self.numerator * other.denominator, self.denominator * other.numerator)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __rsub__(self, other: 'str | Number') -> 'Rational':
+        return _as_rational(other) - self
+
+    def __rtruediv__(self, other: 'str | Number') -> 'Rational':
+        return _as_rational(other) / self
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (str, Number, Rational)):
+            return NotImplemented
+        other = _as_rational(other)
+        # both are in lowest terms, so equal values have equal parts
+        return self.numerator == other.numerator and self.denominator == other.denominator
+
+    def __lt__(self, other: 'str | Number | Rational') -> bool:
+        return _compare_rationals(self, _as_rational(other)) < 0
+
+    def __le__(self, other: 'str | Number | Rational') -> bool:
+        return _compare_rationals(self, _as_rational(other)) <= 0
+
+    def __gt__(self, other: 'str | Number | Rational') -> bool:
+        return _compare_rationals(self, _as_rational(other)) > 0
+
+    def __ge__(self, other: 'str | Number | Rational') -> bool:
+        return _compare_rationals(self, _as_rational(other)) >= 0
+
+    def __hash__(self) -> int:
+        return hash((self.numerator, self.denominator))
+
+
+_ONE = Number(1, [1])
+
+
+def _rational(numerator: Number, denominator: Number) -> 'Rational':
+    # skips the reduction - only for parts already in lowest terms
+    rational = Rational.__new__(Rational)
+    rational.numerator, rational.denominator = numerator, denominator
+    return rational
+
+
+def _as_rational(value: 'str | Number | Rational') -> Rational:
+    return value if isinstance(value, Rational) else Rational(value)
+
+
+def _as_fraction(value: 'str | Number | Rational') -> tuple[Number, Number]:
+    # (numerator, denominator) as whole Numbers: A x 10^-e is A / 10^e
+    if isinstance(value, Rational):
+        return value.numerator, value.denominator
+    number = to_number(value)
+    if number.exponent >= 0:
+        return Number(number.sign, _shift_left(number.limbs, number.exponent)), _ONE
+    return Number(number.sign, number.limbs), Number(1, _shift_left([1], -number.exponent))
+
+
+def _lowest_terms(sign: int, numerator: list[int], denominator: list[int]) -> tuple[Number, Number]:
+    divisor = _gcd(numerator, denominator)
+    if _compare(divisor, [1]) != 0:
+        numerator, _ = _divmod(numerator, divisor)
+        denominator, _ = _divmod(denominator, divisor)
+    return Number(sign, numerator), Number(1, denominator)
+
+
+def _compare_rationals(rational1: Rational, rational2: Rational) -> int:
+    # a / b against c / d is a * d against c * b, as the denominators are positive
+    left = rational1.numerator * rational2.denominator
+    right = rational2.numerator * rational1.denominator
+    return (left > right) - (left < right)
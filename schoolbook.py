@@ -0,0 +1,371 @@
+'''Codifying the arithmetic we're taught at school
+We only work with single-digit integer values but we can add / subtract / multiply / divide and 
+logically work with the results e.g. we work out what 123.456 + 7.89 is by manipulating integers
+in sequence.
+
+These are the reference implementations - operations.py does the same arithmetic on a faster
+internal representation and is what everything else should use.
+'''
+
+from collections.abc import Iterable, Iterator
+
+import utils
+from utils import (
+    _add_ints,
+    _subtract_ints,
+    _multiply_ints,
+    _is_zero,
+    _clean_number,
+    _align_numbers,
+    _equivalent_division,
+    _format_int_and_decimal,
+    _int_and_decimal,
+    _bracket_period,
+    _compare_strings,
+    _validate_numbers,
+)
+
+
+_ZERO = ord('0')
+
+
+def add(
+    number1: str, 
+    number2: str, 
+) -> str:
+    _validate_numbers(number1, number2)
+    # handle negative inputs
+    if number1.startswith('-') and number2.startswith('-'):
+        # add the absolute values and negate the result
+        return f'-{add(number1[1:], number2[1:])}'
+    
+    elif number1.startswith('-'):  # -4 + 2 => 2 - 4
+        return subtract(number2, number1[1:])
+
+    elif number2.startswith('-'):  # -4 + 2 => 2 - 4
+        return subtract(number1, number2[1:])
+
+    # neither input is negative
+
+    v1, v2 = _align_numbers(number1, number2)
+
+    # This just applies add_int inside a loop and carries the 1 if necessary
+    # The answer is filled in right-to-left in a buffer of characters, so each digit is one write
+    # rather than building a new string
+    carry = 0
+    output = bytearray(v1, 'ascii')
+    for i in range(len(v1) - 1, -1, -1):
+        if v1[i] == '.':
+            continue
+
+        result = _add_ints(v1[i], v2[i])
+        if carry:  # can only ever be 1 or 0?
+            result += carry
+
+        if result >= 10:
+            carry = 1
+            result -= 10
+        else:
+            carry = 0
+        
+        output[i] = _ZERO + result
+        
+    output = output.decode('ascii')
+    if carry:
+        return f'1{output}'
+    return output
+
+
+def subtract(
+    number1: str, 
+    number2: str, 
+) -> str:
+    _validate_numbers(number1, number2)
+    # handle negative inputs
+    if number1.startswith('-') and number2.startswith('-'):            
+        result = subtract(number1[1:], number2[1:])
+        if result.startswith('-'):
+            # if we subtract a bigger negative from a smaller negative, we get a positive result
+            return result[1:]
+        return f'-{result}'
+
+    elif number1.startswith('-'):  # -4 - 2 => -(4 + 2)
+        return f'-{add(number1[1:], number2)}'
+    elif number2.startswith('-'): # 4 - -2 => 4 + 2
+        return add(number1, number2[1:])
+
+    # neither input is negative
+
+    v1, v2 = _align_numbers(number1, number2)
+
+    # both numbers are aligned - easy to see which is bigger. String sorting even makes this possible
+    negative = None
+    for int1, int2 in zip(v1, v2):
+        if int1 == int2:
+            continue
+        elif int1 > int2:
+            negative = False
+        else:
+            negative = True
+        break
+    
+    # numbers are identical
+    if negative is None:
+        return '0'
+    elif negative:
+        # swap the numbers so we can do the subtraction
+        v1, v2 = v2, v1
+
+    # Rather than going back along v1 to borrow from the next non-zero digit, remember that we
+    # borrowed and take the 1 off the next column along - the zeroes in between become 9s just the
+    # same, but each digit is only visited once. As in add, the answer goes in a buffer.
+    borrow = 0
+    output = bytearray(v1, 'ascii')
+    for i in range(len(v1)-1, -1, -1):
+        if v1[i] == '.':
+            continue
+
+        result = _subtract_ints(v1[i], v2[i]) - borrow
+        if result < 0:
+            # we need to borrow from higher value places
+            # we know a higher value place exists because the values aren't equal 
+            # and we know v1 > v2
+            result += 10  # 3 - 6 = -3, but 13 - 6 = 7 => result += 10
+            borrow = 1
+        else:
+            borrow = 0
+        
+        output[i] = _ZERO + result
+        
+    # strip any leading / trailing zeros?
+    output = _clean_number(output.decode('ascii'))
+    if negative:
+        output = '-' + output
+    return output
+
+
+def multiply(
+    number1: str, 
+    number2: str, 
+) -> str:
+    _validate_numbers(number1, number2)
+    # handle negative inputs
+    if number1.startswith('-') and number2.startswith('-'):            
+        return multiply(number1[1:], number2[1:])
+    elif number1.startswith('-'):
+        return f'-{multiply(number1[1:], number2)}'
+    elif number2.startswith('-'):
+        return f'-{multiply(number1, number2[1:])}'
+
+    # neither input is negative
+
+    # save ourselves some CPU cycles
+    if _is_zero(number1) or _is_zero(number2):
+        return '0'
+
+    v1, v2 = _align_numbers(number1, number2)
+
+    # count all decimal places, then perform total integer multiplication, and re-add the 
+    # decimal place later
+    decimal_places = 0
+    if '.' in v1:
+        i, d = v1.split('.')
+        decimal_places += len(d)
+        v1 = v1.replace('.', '')
+    if '.' in v2:
+        i, d = v2.split('.')
+        decimal_places += len(d)
+        v2 = v2.replace('.', '')
+
+    # All the partial products are summed up together, one column at a time
+    total = sum_numbers(_partial_products(v1, v2))
+
+    # re-add the decimal place
+    if decimal_places > 0:
+        total = total.rjust(decimal_places + 1, '0')
+        integer = total[:-decimal_places]
+        decimal = total[-decimal_places:]
+        total = f'{integer}.{decimal}'
+
+    total = _clean_number(total)
+    return total
+    
+
+def _partial_products(v1: str, v2: str) -> Iterator[str]:
+    # start at right-most value of v2, multiply by each digit of v1
+    padding = 0
+    for i in range(len(v2)-1, -1, -1):
+        digit2 = v2[i]
+
+        # when multiplying, need to pad the right-hand side with zeros 
+        # i.e. we are multiplying by 30, not 3 -> pad the right
+        output = '0' * padding
+        carry = 0
+        for j in range(len(v1)-1, -1, -1):
+            result = _multiply_ints(v1[j], digit2)
+            if utils.CHECKED:
+                result = add(str(result), str(carry))
+
+                if len(result) > 1:
+                    # can only be max 2-digits. Even if we are multiplying 9999 * 9999, then max of
+                    # and operation will be 81 + 8 => 89 i.e. still 2 digits
+                    carry = int(result[0])
+                    result = result[1]
+                else:
+                    carry = 0
+            else:
+                # the same thing, without going through add() for every digit
+                carry, result = divmod(result + carry, 10)
+        
+            # pre-pend, not append, to the output
+            output = str(result) + output
+        
+        # inner loop has finished - hand it over and perform next loop
+        if carry:
+            output = str(carry) + output
+        
+        yield output
+        padding += 1
+
+
+def sum_numbers(numbers: Iterable[str]) -> str:
+    # Adding a long list of numbers two at a time means lining up and going over the running total
+    # again for every number. Instead, add every number's digits into a total for each column -
+    # these soon go past 9, which is fine - and only do the carrying once, right-to-left, at the
+    # end. Positive and negative numbers get their own columns, and are subtracted at the end.
+    columns = {False: ([], []), True: ([], [])}  # integer columns (units first), decimal columns
+    for number in numbers:
+        _validate_numbers(number)
+        negative = number.startswith('-')
+        integer, decimal = _int_and_decimal(number[1:] if negative else number)
+        integers, decimals = columns[negative]
+        if len(integers) < len(integer):
+            integers.extend([0] * (len(integer) - len(integers)))
+        if len(decimals) < len(decimal):
+            decimals.extend([0] * (len(decimal) - len(decimals)))
+        for i, digit in enumerate(reversed(integer)):
+            integers[i] += int(digit)
+        for i, digit in enumerate(decimal):
+            decimals[i] += int(digit)
+
+    positive = _carry_columns(*columns[False])
+    negative = _carry_columns(*columns[True])
+    if not columns[True][0] and not columns[True][1]:
+        return positive
+    elif not columns[False][0] and not columns[False][1]:
+        return f'-{negative}'
+    return subtract(positive, negative)
+
+
+def _carry_columns(integers: list[int], decimals: list[int]) -> str:
+    # each column keeps its last digit and carries the rest - however many digits that is - on to
+    # the next column along
+    carry = 0
+    decimal = []
+    for i in range(len(decimals)-1, -1, -1):
+        carry, digit = divmod(decimals[i] + carry, 10)
+        decimal.append(str(digit))
+
+    integer = []
+    for column in integers:
+        carry, digit = divmod(column + carry, 10)
+        integer.append(str(digit))
+    while carry:
+        carry, digit = divmod(carry, 10)
+        integer.append(str(digit))
+
+    integer = ''.join(reversed(integer)).lstrip('0') or '0'
+    return _format_int_and_decimal(integer, ''.join(reversed(decimal)))
+
+
+def divide(
+    number1: str, 
+    number2: str, 
+    max_decimals: int = 10,
+    repeating: bool = False,
+) -> str:
+    _validate_numbers(number1, number2)
+    if _is_zero(number2):
+        raise ZeroDivisionError()
+
+    # handle negative inputs
+    if number1.startswith('-') and number2.startswith('-'):            
+        return divide(number1[1:], number2[1:], max_decimals, repeating)
+    elif number1.startswith('-'):
+        return f'-{divide(number1[1:], number2, max_decimals, repeating)}'
+    elif number2.startswith('-'):
+        return f'-{divide(number1, number2[1:], max_decimals, repeating)}'
+
+    # neither input is negative
+
+    # save ourselves some CPU cycles
+    if _is_zero(number1):
+        return '0'
+    
+    v1, v2 = _equivalent_division(number1, number2)
+    if '.' not in v1:
+        v1 = f'{v1}.0'  # ensure we always have a decimal so no special case handling
+
+    # I always used to do multiplication 1-9 of the divisor, and then just look up the biggest 
+    # one that fits...
+    lookup = {i: multiply(v2, str(i)) for i in range(0, 10)}
+
+    # Once we're only bringing down zeroes, the next digit depends on nothing but what's left
+    # over - so if we've had this remainder before, the digits since then repeat forever and
+    # there's no need to work them out again
+    seen = {}
+
+    output = ''
+    value = ''
+    decimal = False
+    n_decimals = 0
+    i = 0
+    while True:
+        # Can't think of the requisite logic for a single conditional
+        # we msut run until at least len(v1), and if we have a remainder at that point, we keep 
+        # going until we exceed max_decimals
+        if i >= len(v1) and value in seen:
+            start = seen[value]
+            if repeating:
+                integer, _, decimals = output[:start].partition('.')
+                return _bracket_period(f"{integer.lstrip('0') or '0'}.{decimals}", output[start:])
+            # copy the repeating digits out to max_decimals
+            period = output[start:]
+            missing = max_decimals - n_decimals
+            output += (period * (missing // len(period) + 1))[:missing]
+            break
+        if i >= len(v1):
+            seen[value] = len(output)
+
+        if i >= len(v1) and n_decimals >= max_decimals:
+            break
+
+        if i < len(v1):
+            if v1[i] == '.':
+                output += '.'
+                decimal = True
+                i += 1
+                continue
+
+            value = f'{value}{v1[i]}'
+        else:
+            value = f'{value}0'
+
+        # lookup goes down to 0 - so something will always fit
+        for j in range(9, -1, -1):
+            multiple = lookup[j]
+            if _compare_strings(multiple, value) <= 0:
+                output += str(j)
+                value = subtract(value, multiple)
+                if decimal:
+                    n_decimals += 1
+                break
+
+        # we have finished iterating over the number and we have no remainder -> finshed!
+        if i >= len(v1) and value == '0':
+            break
+        
+        i += 1
+
+    output = _clean_number(output)
+    return output
@@ -1,12 +1,70 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
+import math
+import os
+import random
+import tempfile
+import threading
 import unittest
 
+from async_operations import adivide, amultiply
+import files
+import instrument
+import limbs
+import parallel
+import schoolbook
+from cache import LRUCache
+from context import CEILING, FLOOR, HALF_EVEN, HALF_UP, Context, get_context, local_context
+from expression import compile_expression, evaluate
+from limbs import (
+    BASE,
+    _divmod,
+    _divmod_newton,
+    _divmod_schoolbook,
+    _from_digits,
+    _multiply,
+    _multiply_karatsuba,
+    _multiply_schoolbook,
+    _multiply_toom3,
+    _square,
+    _square_karatsuba,
+    _square_schoolbook,
+    _to_digits,
+)
+from number import Number
+import operations
 from operations import (
     add,
+    add_many,
+    compare,
     divide,
+    divide_iter,
+    divide_many,
+    eq,
+    ge,
+    gt,
+    le,
+    lt,
     multiply,
+    multiply_many,
+    power,
+    power_mod,
+    scientific,
+    sqrt,
     subtract,
+    subtract_many,
+    sum_numbers,
+    sum_of_squares_lt_one,
 )
+import pi
+from pi_chudnovsky import calculate_pi
+from random_digits import RandomDigits
+from rational import Rational
+import utils
 from utils import (
+    _add_ints,
     _align_numbers,
     _clean_number,
     _equivalent_division,
@@ -14,12 +72,30 @@ from utils import (
     _int_and_decimal,
     _is_zero,
     _lte,
+    _multiply_ints,
     _pad_strings,
+    _subtract_ints,
 )
 
 
 class UtilsTests(unittest.TestCase):
 
+    def test__fundamental_operations(self):
+        # the look-up tables and the checked versions agree
+        for checked in (False, True):
+            with utils.checked(checked):
+                self.assertEqual(_add_ints('7', 8), 15)
+                self.assertEqual(_subtract_ints(3, '9'), -6)
+                self.assertEqual(_multiply_ints('9', '9'), 81)
+        with utils.checked():
+            with self.assertRaises(AssertionError):
+                _add_ints(10, 1)
+        self.assertFalse(utils.CHECKED)
+
+        # without the per-digit checks, whole numbers are checked on the way in instead
+        with self.assertRaises(ValueError):
+            schoolbook.add("12a", "1")
+
     def test__pad_strings(self):
         self.assertEqual(_pad_strings("0", "2", False), ("0", "2"))
         self.assertEqual(_pad_strings("0", "2", True), ("0", "2"))
@@ -98,6 +174,35 @@ class UtilsTests(unittest.TestCase):
         self.assertTrue(_lte("1235", "1235"))
         self.assertFalse(_lte("1236", "1235"))
 
+        # the decimal point, not the length, decides
+        self.assertFalse(_lte("10.5", "9.25"))
+        self.assertTrue(_lte("9.25", "10.5"))
+        self.assertTrue(_lte("-10.5", "-9.25"))
+        self.assertTrue(_lte("0.5", "00.50"))
+
+    def test__compare(self):
+        self.assertEqual(compare("10.5", "9.25"), 1)
+        self.assertEqual(compare("9.25", "10.5"), -1)
+        self.assertEqual(compare("-0", "0"), 0)
+        self.assertEqual(compare("0.000", "0"), 0)
+        self.assertEqual(compare("007.10", "7.1"), 0)
+        self.assertEqual(compare("-7.01", "-7.1"), 1)
+        self.assertEqual(compare(".5", "0.49"), 1)
+        self.assertEqual(compare(Number.from_string("2.5"), "2.50"), 0)
+
+        self.assertTrue(lt("1.9", "2") and le("2", "2.0") and eq("-0.0", "0"))
+        self.assertTrue(gt("2", "1.99") and ge("2.0", "2"))
+
+        with self.assertRaises(ValueError):
+            compare("1.2.3", "1")
+
+        # every pair agrees with Python's ints once scaled
+        rng = random.Random(17)
+        for _ in range(500):
+            values = [rng.randint(-10**6, 10**6) for _ in range(2)]
+            strings = [f'{"-" if v < 0 else ""}{abs(v) // 1000}.{abs(v) % 1000:03}' for v in values]
+            self.assertEqual(compare(*strings), (values[0] > values[1]) - (values[0] < values[1]))
+
 
 class TestOperation(unittest.TestCase):
 
@@ -243,6 +348,102 @@ class TestOperation(unittest.TestCase):
         self.assertEqual(divide('22', '7', 30), "3.142857142857142857142857142857")
         self.assertEqual(divide('22', '7', 50), "3.14285714285714285714285714285714285714285714285714")
 
+    def test__divide__repeating(self):
+        self.assertEqual(divide('1', '3', repeating=True), "0.(3)")
+        self.assertEqual(divide('1', '6', repeating=True), "0.1(6)")
+        self.assertEqual(divide('-22', '7', repeating=True), "-3.(142857)")
+        self.assertEqual(divide('1', '4', repeating=True), "0.25")
+        self.assertEqual(divide('1', '97', 100, repeating=True)[-6:], "85567)")
+        # a period longer than max_decimals can't be shown, so it's cut off as usual
+        self.assertEqual(divide('1', '97', 10, repeating=True), divide('1', '97', 10))
+
+    def test__sqrt(self):
+        self.assertEqual(sqrt("0"), "0")
+        self.assertEqual(sqrt("4"), "2")
+        self.assertEqual(sqrt("0.0004"), "0.02")
+        self.assertEqual(sqrt("2"), "1.4142135623")
+        self.assertEqual(sqrt("2", 30), "1.414213562373095048801688724209")
+        self.assertEqual(sqrt("123.456", 5), "11.11107")
+        self.assertEqual(sqrt("99", 0), "9")
+        with self.assertRaises(ValueError):
+            sqrt("-1")
+
+    def test__power(self):
+        self.assertEqual(power("2", 10), '1024')
+        self.assertEqual(power("-1.5", 3), '-3.375')
+        self.assertEqual(power("0", 0), '1')
+        self.assertEqual(power("1.1", 10, 3), '2.593')
+        self.assertEqual(power("2", -3), '0.125')
+        self.assertEqual(power("3", -2, 5), divide("1", "9", 5))
+        with local_context(rounding=HALF_UP):
+            self.assertEqual(power("1.1", 10, 3), '2.594')
+        with self.assertRaises(ZeroDivisionError):
+            power("0", -1)
+
+        rng = random.Random(22)
+        for _ in range(100):
+            base, exponent = rng.randint(-10**12, 10**12), rng.randint(0, 30)
+            self.assertEqual(power(str(base), exponent), str(base ** exponent))
+            number = f'{base}.{rng.randint(0, 99):02}'
+            expected = "1"
+            for _ in range(exponent):
+                expected = multiply(expected, number)
+            self.assertEqual(power(number, exponent), expected)
+
+    def test__power_mod(self):
+        self.assertEqual(power_mod("4", 13, "497"), '445')
+        self.assertEqual(power_mod("-7", "3", "10"), str(pow(-7, 3, 10)))
+        self.assertEqual(power_mod("5", 0, "1"), '0')
+        self.assertEqual(power_mod("2", 10**30 + 7, str(10**20 + 39)), str(pow(2, 10**30 + 7, 10**20 + 39)))
+        for arguments in (("1.5", 2, "7"), ("2", -1, "7"), ("2", 2, "0")):
+            with self.assertRaises(ValueError):
+                power_mod(*arguments)
+
+    def test__sum_numbers(self):
+        self.assertEqual(sum_numbers([]), '0')
+        self.assertEqual(sum_numbers(["0.5", "0.25", "1"]), '1.75')
+        self.assertEqual(sum_numbers(["0.8", "0.2"]), '1.0')  # as add() - same signs keep the decimals
+        self.assertEqual(sum_numbers(["5.50", "-0.5", "-2"]), '3')
+        self.assertEqual(sum_numbers(["-1.1", "-2.20"]), '-3.30')
+        self.assertEqual(sum_numbers(f"0.{i}" for i in range(1, 10)), '4.5')
+        with local_context(precision=2):
+            self.assertEqual(sum_numbers(["123", "456"]), '570')
+
+        rng = random.Random(21)
+        for _ in range(200):
+            numbers = [f'{rng.choice(["", "-"])}{rng.randint(0, 10**30)}.{rng.randint(0, 10**rng.randint(0, 20))}' for _ in range(rng.randint(1, 20))]
+            total = '0'
+            for number in numbers:
+                total = add(total, number)
+            self.assertEqual(Number.from_string(sum_numbers(iter(numbers))), Number.from_string(total))
+            if len(numbers) > 1:
+                self.assertEqual(sum_numbers(numbers[:2]), add(*numbers[:2]))
+
+    def test__sum_of_squares_lt_one(self):
+        self.assertTrue(sum_of_squares_lt_one("0.1", "0.2"))
+        self.assertFalse(sum_of_squares_lt_one("0.6", "0.8"))  # exactly on the circle
+        self.assertFalse(sum_of_squares_lt_one("0.6", "0.8000000001"))
+        self.assertTrue(sum_of_squares_lt_one("0.6", "0.7999999999999"))
+        self.assertTrue(sum_of_squares_lt_one("-0.6", "0.79"))
+        self.assertFalse(sum_of_squares_lt_one("1.0", "0"))
+        self.assertTrue(sum_of_squares_lt_one(Number.from_string("0.6"), "0.5"))
+
+        rng = random.Random(0)
+        for _ in range(1000):
+            x, y = (f"0.{rng.randrange(10 ** 12):012}" for _ in range(2))
+            self.assertEqual(sum_of_squares_lt_one(x, y), add(multiply(x, x), multiply(y, y))[0] == '0')
+
+    def test__run_batch_fast(self):
+        # the fast test must count exactly the same points as multiplying out
+        self.assertEqual(pi.run_batch(2000, report=False, seed=1), pi.run_batch(2000, report=False, seed=1, fast=True))
+
+    def test__calculate_pi(self):
+        pi_100 = "3.1415926535897932384626433832795028841971693993751058209749445923078164062862089986280348253421170679"
+        self.assertEqual(calculate_pi(0), "3")
+        self.assertEqual(calculate_pi(2), "3.14")
+        self.assertEqual(calculate_pi(100), pi_100)
+        self.assertEqual(calculate_pi(1000)[:102], pi_100)
+
     def test__divide__decimal(self):
         from decimal import Decimal, getcontext
         getcontext().prec = 50
@@ -250,5 +451,600 @@ class TestOperation(unittest.TestCase):
         self.assertEqual(divide('22', '7', 50), "3.14285714285714285714285714285714285714285714285714")
 
 
+class NumberTests(unittest.TestCase):
+
+    def test__from_string_and_str(self):
+        for value in ("0", "7", "123456789", "1234567890", "0.5", "-0.0025", "100.00", "-98765432109876543210.0123456789"):
+            self.assertEqual(str(Number.from_string(value)), value)
+
+        self.assertEqual(str(Number.from_string(".5")), "0.5")
+        self.assertEqual(str(Number.from_string("-0")), "0")
+
+        for value in ("", "-", ".", "1.2.3", "12a", "1e", "e5", "1e+-5", "1e5.0", "+1"):
+            with self.assertRaises(ValueError):
+                Number.from_string(value)
+
+    def test__scientific(self):
+        self.assertEqual(str(Number.from_string("1.5e-5")), "0.000015")
+        self.assertEqual(str(Number.from_string("-25E+3")), "-25000")
+        self.assertEqual(str(Number.from_string("0e5")), "0")
+        self.assertEqual(Number.from_string("1e100000").limbs, [1])
+        self.assertEqual(Number.from_string("1.50e-300").scientific(), "1.5e-300")
+        self.assertEqual(Number.from_string("-1500").scientific(), "-1.5e3")
+        self.assertEqual(Number.from_string("0.0").scientific(), "0e0")
+        self.assertEqual(hash(Number.from_string("1500")), hash(Number(1, [1500])))
+
+        # zero runs only go into the exponent, but the answers are written out in full as usual
+        big, small = f"1{'0' * 100000}", f"0.{'0' * 100000}1"
+        self.assertEqual(add(big, small), f"{big}.{small[2:]}")
+        self.assertEqual(add("1e100000", "1e-100001"), f"{big}.{small[2:]}")
+        self.assertEqual(multiply(big, "2e-100000"), "2")
+        self.assertEqual(divide(big, "4e99999"), "2.5")
+        self.assertEqual(compare("1e100000", "9" * 1000), 1)
+        self.assertEqual(scientific(multiply("3e200", "5e-500")), "1.5e-299")
+
+    def test__normalized(self):
+        self.assertEqual(str(Number.from_string("0.0100").normalized()), "0.01")
+        self.assertEqual(str(Number.from_string("100").normalized()), "100")
+        self.assertEqual(str(Number.from_string("1000000000.000000000").normalized()), "1000000000")
+        self.assertEqual(str(Number.from_string("-0.000").normalized()), "0")
+
+    def test__chained_arithmetic(self):
+        x = Number.from_string("0.1234567891")
+        y = Number.from_string("0.9876543219")
+        self.assertEqual(str(x * x + y * y), "0.99070263834263069842")
+        self.assertTrue(x * x + y * y < Number.from_string("1"))
+        self.assertEqual(str((x - y).divide(x, 8)), "-7.00000007")
+        self.assertEqual(Number.from_string("1.50"), Number.from_string("1.5"))
+
+    def test__limbs(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            a = rng.randrange(10 ** rng.randint(1, 120))
+            b = rng.randrange(1, 10 ** rng.randint(1, 120))
+            la, lb = _from_digits(str(a)), _from_digits(str(b))
+            self.assertEqual(_to_digits(_multiply(la, lb)), str(a * b))
+            quotient, remainder = _divmod(la, lb)
+            self.assertEqual((_to_digits(quotient), _to_digits(remainder)), (str(a // b), str(a % b)))
+
+    def test__multiply_algorithms(self):
+        rng = random.Random(1)
+        for length1, length2 in ((60, 60), (61, 40), (200, 200), (300, 170), (400, 120)):
+            # lots of 0 and BASE - 1 limbs to exercise the carries and borrows
+            a = [rng.choice((0, BASE - 1, rng.randrange(BASE))) for _ in range(length1 - 1)] + [BASE - 1]
+            b = [rng.choice((0, BASE - 1, rng.randrange(BASE))) for _ in range(length2 - 1)] + [1]
+            expected = _multiply_schoolbook(a, b)
+            self.assertEqual(_multiply_karatsuba(a, b), expected)
+            self.assertEqual(_multiply_toom3(a, b), expected)
+            self.assertEqual(_multiply(a, b), expected)
+            self.assertEqual(_multiply(b, a), expected)
+
+    def test__square_algorithms(self):
+        rng = random.Random(22)
+        for length in (1, 2, 31, 32, 60, 151, 200):
+            a = [rng.choice((0, BASE - 1, rng.randrange(BASE))) for _ in range(length - 1)] + [BASE - 1]
+            expected = _multiply_schoolbook(a, a)
+            self.assertEqual(_square_schoolbook(a), expected)
+            self.assertEqual(_square_karatsuba(a) if length > 1 else expected, expected)
+            self.assertEqual(_square(a), expected)
+        self.assertEqual(_square([]), [])
+
+    def test__square_shared_limbs(self):
+        # only a square when the exponents match too
+        x = Number.from_string("12")
+        self.assertEqual(multiply(x, Number(1, x.limbs, -1)), "14.4")
+        self.assertEqual(multiply(x, Number(-1, x.limbs, 3)), "-144000")
+        self.assertEqual(multiply(x, -x), "-144")
+
+    def test__divide_algorithms(self):
+        rng = random.Random(2)
+        threshold = limbs.NEWTON_DIVISION_THRESHOLD
+        # a small threshold so the Newton iteration takes several steps on modest inputs
+        limbs.NEWTON_DIVISION_THRESHOLD = 4
+        try:
+            for length1, length2 in ((40, 20), (41, 5), (90, 60), (200, 30), (120, 119)):
+                a = [rng.choice((0, BASE - 1, rng.randrange(BASE))) for _ in range(length1 - 1)] + [BASE - 1]
+                b = [rng.choice((0, BASE - 1, rng.randrange(BASE))) for _ in range(length2 - 1)] + [1]
+                self.assertEqual(_divmod_newton(a, b), _divmod_schoolbook(a, b))
+        finally:
+            limbs.NEWTON_DIVISION_THRESHOLD = threshold
+
+    def test__divide_long_quotient(self):
+        from decimal import ROUND_DOWN, Decimal, localcontext
+        divisor = "9" * 1800 + ".123456789"
+        for number1, number2 in (("1", "7"), ("2" * 2000, divisor), (divisor, "3" * 1900)):
+            with localcontext() as context:
+                context.prec = 10000
+                expected = (Decimal(number1) / Decimal(number2)).quantize(Decimal("1e-3000"), rounding=ROUND_DOWN)
+            self.assertEqual(divide(number1, number2, 3000), _clean_number(format(expected, "f")))
+
+
+class DivideIterTests(unittest.TestCase):
+
+    def test__matches_divide(self):
+        for number1, number2 in (("6", "1"), ("10", "4"), ("19.752", "1.2345"), ("19.752", "16"), ("-69249", "123"), ("0", "5"), ("0.5", "-4"), ("1.50", "1")):
+            self.assertEqual(''.join(divide_iter(number1, number2)), divide(number1, number2, 50))
+
+    def test__stop_early(self):
+        # 22 / 7 never ends, but we only work out as many digits as we ask for
+        self.assertEqual(''.join(itertools.islice(divide_iter('22', '7'), 52)), divide('22', '7', 50))
+        self.assertEqual(''.join(itertools.islice(divide_iter('-1', '3'), 5)), "-0.33")
+
+    def test__resume(self):
+        digits = divide_iter('22', '7')
+        first = ''.join(itertools.islice(digits, 10))
+        state = digits.state
+        rest = ''.join(itertools.islice(divide_iter(state=state), 42))
+        self.assertEqual(first + rest, divide('22', '7', 50))
+        # the state is unaffected by carrying on with the original iterator
+        self.assertEqual(''.join(itertools.islice(digits, 42)), rest)
+
+    def test__divide_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            divide_iter('1', '0.0')
+
+
+class BatchTests(unittest.TestCase):
+    numbers1 = ["0", "7", "96", "1000", "0.8", "0.0025", "123.456", "0.1234567891", "0.0", "5.50"]
+    numbers2 = ["2", "97", "7", "999", "0.2", "1", "987.654", "0.9876543219", "0.00", "5.5"]
+
+    def _check_batches(self, numbers1: list, numbers2: list):
+        self.assertEqual(add_many(numbers1, numbers2), [add(a, b) for a, b in zip(numbers1, numbers2)])
+        self.assertEqual(subtract_many(numbers1, numbers2), [subtract(a, b) for a, b in zip(numbers1, numbers2)])
+        self.assertEqual(multiply_many(numbers1, numbers2), [multiply(a, b) for a, b in zip(numbers1, numbers2)])
+
+    @unittest.skipIf(operations.numpy is None, "numpy is not installed")
+    def test__column_wise(self):
+        self.assertIsNotNone(operations._batch_shape(self.numbers1, self.numbers2))
+        self._check_batches(self.numbers1, self.numbers2)
+        self._check_batches(self.numbers2, self.numbers1)
+
+    def test__one_pair_at_a_time(self):
+        # negative numbers can't be done column-wise, so these always fall back
+        numbers1 = self.numbers1 + ["-6.3"]
+        numbers2 = self.numbers2 + ["76.7"]
+        self.assertIsNone(operations._batch_shape(numbers1, numbers2))
+        self._check_batches(numbers1, numbers2)
+        self.assertEqual(divide_many(["22", "-10"], ["7", "4"], 5), ["3.14285", "-2.5"])
+
+    def test__long_or_uneven(self):
+        # padding every row out to one long number would waste time and memory, so these go pair-wise
+        long = "7" * (operations.BATCH_MAX_DIGITS + 1)
+        self.assertIsNone(operations._batch_shape([long], ["3"]))
+        uneven = ["0.25"] * 99 + ["9" * 200]
+        self.assertIsNone(operations._batch_shape(uneven, uneven))
+        self._check_batches([long, "0.5"], ["3", "12"])
+
+    def test__mismatched_lengths(self):
+        with self.assertRaises(ValueError):
+            add_many(["1", "2"], ["3"])
+
+
+class ExpressionTests(unittest.TestCase):
+
+    def test__matches_operations(self):
+        for a, b in [("3.2", "3.14"), ("-7", "22"), ("0.5", "0.25"), ("100", "-0.3")]:
+            self.assertEqual(
+                evaluate("(a - b) / b * 100", 12, a=a, b=b),
+                multiply(divide(subtract(a, b), b, 12), "100"),
+            )
+        self.assertEqual(evaluate("1 + 2 * 3 - -4 / 2"), subtract(add("1", multiply("2", "3")), divide("-4", "2")))
+        self.assertEqual(evaluate("0.8 + 0.2"), "1.0")
+        self.assertEqual(evaluate("1 / 3", 5), "0.33333")
+        self.assertEqual(evaluate("sqrt(x * 2)", 5, x=Number.from_string("1")), "1.41421")
+
+    def test__shared_subexpressions(self):
+        expression = compile_expression("(a - b) / b + b * (a - b) + (b - a)")
+        self.assertEqual(expression.names, ('a', 'b'))
+        # a, b, a - b, the division, b * (a - b), the first +, b - a and the last +
+        self.assertEqual(len(expression._steps), 8)
+        self.assertIs(compile_expression("(a - b) / b + b * (a - b) + (b - a)"), expression)
+        self.assertEqual(expression(a="3", b="2"), "1.5")
+        self.assertEqual(expression(a="10", b="4"), "19.5")
+
+    def test__errors(self):
+        for text in ["", "1 +", "(1", "1 $ 2", "1 2", "foo(2)"]:
+            with self.assertRaises(ValueError):
+                evaluate(text)
+        with self.assertRaises(ValueError):
+            evaluate("a + b", a="1")
+        with self.assertRaises(ZeroDivisionError):
+            evaluate("1 / (a - a)", a="5")
+
+
+class ContextTests(unittest.TestCase):
+
+    def test__unbounded(self):
+        # the default context changes nothing
+        self.assertEqual(get_context(), Context())
+        self.assertEqual(add("0.8", "0.2"), "1.0")
+        self.assertEqual(multiply("1.23456789", "9.87654321"), "12.1932631112635269")
+        self.assertEqual(divide("2", "3", 5), "0.66666")
+
+    def test__precision(self):
+        with local_context(precision=5):
+            self.assertEqual(multiply("1.23456789", "9.87654321"), "12.193")
+            self.assertEqual(add("99999", "1"), "100000")
+            self.assertEqual(add("123456", "1"), "123450")
+            self.assertEqual(divide("2", "3", 20), "0.66666")
+            self.assertEqual(evaluate("a * a * a", a="1.1111"), "1.3716")
+        self.assertEqual(multiply("1.23456789", "9.87654321", context=Context(3, HALF_UP)), "12.2")
+
+    def test__rounding(self):
+        expected = {
+            None: ("0.6666", "-0.6666", "0.125", "0.135"),
+            HALF_EVEN: ("0.6667", "-0.6667", "0.12", "0.14"),
+            HALF_UP: ("0.6667", "-0.6667", "0.13", "0.14"),
+            CEILING: ("0.6667", "-0.6666", "0.13", "0.14"),
+            FLOOR: ("0.6666", "-0.6667", "0.12", "0.13"),
+        }
+        for rounding, (positive, negative, tie, odd_tie) in expected.items():
+            changes = {} if rounding is None else {'rounding': rounding}
+            with local_context(**changes):
+                self.assertEqual(divide("2", "3", 4), positive)
+                self.assertEqual(divide("-2", "3", 4), negative)
+                if rounding is not None:
+                    with local_context(precision=2):
+                        self.assertEqual(multiply("0.125", "1"), tie)
+                        self.assertEqual(multiply("0.135", "1"), odd_tie)
+
+    def test__threads(self):
+        # each thread starts from the default context
+        seen = []
+        with local_context(precision=2):
+            thread = threading.Thread(target=lambda: seen.append(multiply("1.23", "1")))
+            thread.start()
+            thread.join()
+            self.assertEqual(multiply("1.23", "1"), "1.2")
+        self.assertEqual(seen, ["1.23"])
+
+    def test__invalid(self):
+        with self.assertRaises(ValueError):
+            with local_context(precision=0):
+                pass
+        with self.assertRaises(ValueError):
+            add("1", "2", context=Context(rounding='sideways'))
+
+
+class RationalTests(unittest.TestCase):
+
+    def test__lowest_terms(self):
+        self.assertEqual(str(Rational("0.25")), "1/4")
+        self.assertEqual(str(Rational("6", "-4")), "-3/2")
+        self.assertEqual(str(Rational("1.5", "0.5")), "3")
+        self.assertEqual(str(Rational.from_string("10/100")), "1/10")
+        with self.assertRaises(ZeroDivisionError):
+            Rational("1", "0.0")
+
+    def test__arithmetic(self):
+        third, sixth = Rational("1", "3"), Rational("1", "6")
+        self.assertEqual(str(third + sixth), "1/2")
+        self.assertEqual(str(third - sixth), "1/6")
+        self.assertEqual(str(third * sixth), "1/18")
+        self.assertEqual(str(third / sixth), "2")
+        self.assertEqual(str(-third + "1"), "2/3")
+        self.assertEqual(str("1" - third), "2/3")
+        # no rounding along the way, so dividing and multiplying back is exact
+        self.assertEqual(Rational("22") / "7" * "7", Rational("22"))
+
+    def test__compare(self):
+        self.assertTrue(Rational("1", "3") < Rational("0.34"))
+        self.assertTrue(Rational("-1", "3") > "-0.34")
+        self.assertTrue(Rational("2", "4") == "0.5")
+        self.assertEqual(hash(Rational("2", "4")), hash(Rational("0.5")))
+
+    def test__to_decimal(self):
+        self.assertEqual(Rational("2", "3").to_decimal(5), "0.66666")
+        self.assertEqual(Rational("-22", "7").to_decimal(3), "-3.142")
+        self.assertEqual(Rational("100").to_decimal(), "100")
+
+    def test__whole_limbs_of_zeroes(self):
+        # parts with nine or more zeroes at the end, or nine or more decimal places
+        self.assertTrue(Rational("2000000000") > Rational("3"))
+        self.assertEqual(str(Rational("0.000000001")), "1/1000000000")
+        self.assertEqual(Rational("1000000000000", "3") * "3", Rational("1000000000000"))
+        self.assertEqual(str(Rational("3000000000", "0.000000000002")), "1500000000000000000000")
+        # pi.py's accuracy line, for the counts in the README
+        estimate = Rational("7853471", "10000000") * "4"
+        accuracy = ((estimate - str(math.pi)) / str(math.pi) * "100").to_decimal()
+        self.assertEqual(accuracy, "-0.0065015936")
+
+
+class CacheTests(unittest.TestCase):
+
+    def tearDown(self):
+        operations.disable_cache()
+
+    def test__lru(self):
+        cache = LRUCache(2)
+        self.assertEqual(cache.get('a', lambda: 1), 1)
+        self.assertEqual(cache.get('b', lambda: 2), 2)
+        self.assertEqual(cache.get('a', lambda: None), 1)  # 'a' is now the most recent
+        cache.get('c', lambda: 3)  # so 'b' makes way
+        self.assertEqual(cache.get('b', lambda: 4), 4)
+        self.assertEqual(tuple(cache.stats()), (1, 4, 2, 2, 2))
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(tuple(cache.stats()), (0, 0, 0, 0, 1))
+
+    def test__operations(self):
+        operations.enable_cache(16)
+        self.assertEqual(divide("3", "7"), "0.4285714285")
+        self.assertEqual(divide("3.0", "07"), "0.4285714285")
+        self.assertEqual(operations.operation_cache.stats().hits, 1)
+
+        # the same values, but written differently enough to change the answer
+        self.assertEqual(add("0.8", "0.2"), "1.0")
+        self.assertEqual(add("0.80", "0.2"), "1.00")
+        self.assertEqual(divide("1.000", "3", 1), "0.333")
+        self.assertEqual(divide("1", "3", 1), "0.3")
+        self.assertEqual(operations.operation_cache.stats().hits, 1)
+
+        # divide() doesn't build a multiples table, but divide_iter does - once per divisor
+        self.assertEqual(''.join(itertools.islice(divide_iter("1", "7"), 8)), "0.142857")
+        self.assertEqual(''.join(itertools.islice(divide_iter("3", "7"), 8)), "0.428571")
+        self.assertEqual(operations.multiples_cache.stats()[:2], (1, 1))
+
+        operations.disable_cache()
+        self.assertEqual(divide("3", "7"), "0.4285714285")
+        self.assertEqual(len(operations.operation_cache), 0)
+
+
+class RandomDigitsTests(unittest.TestCase):
+
+    def test__reproducible(self):
+        # the same seed gives the same digits, however many are taken at a time
+        digits = RandomDigits(42)
+        taken = ''.join([digits.take(1), digits.take(999), digits.take(1500), next(digits)])
+        self.assertEqual(taken, RandomDigits(42).take(2501))
+        self.assertEqual(set(taken), set('0123456789'))
+
+    def test__streams(self):
+        self.assertEqual(RandomDigits.stream(7, 1).take(100), RandomDigits.stream(7, 1).take(100))
+        self.assertNotEqual(RandomDigits.stream(7, 1).take(100), RandomDigits.stream(7, 2).take(100))
+        self.assertNotEqual(RandomDigits.stream(7, 1).take(100), RandomDigits.stream(8, 1).take(100))
+
+    def test__numbers(self):
+        numbers = RandomDigits(1).numbers(5, 3)
+        self.assertEqual(len(numbers), 5)
+        self.assertTrue(all(len(number) == 5 and number.startswith('0.') for number in numbers))
+        with self.assertRaises(ValueError):
+            RandomDigits(1).numbers(5, 0)
+
+    def test__skip(self):
+        digits = RandomDigits(3)
+        digits.take(7)
+        digits.skip(2500)
+        self.assertEqual(digits.take(50), RandomDigits(3).take(2557)[-50:])
+
+        # topping up a chunk counts the same points as doing it all in one go
+        first = pi.run_batch(300, 2, report=False, seed=5)
+        rest = pi.run_batch(700, 2, report=False, seed=5, skip=300)
+        self.assertEqual(pi.run_batch(1000, 2, report=False, seed=5), (first[0] + rest[0], first[1] + rest[1]))
+
+
+class SchoolbookTests(unittest.TestCase):
+    # the reference implementations and the fast implementations must always agree
+
+    def test__matches_operations(self):
+        self._check_matches()
+        with utils.checked():
+            self._check_matches()
+
+    def test__long_chains(self):
+        # a carry / borrow that runs the whole way along
+        self.assertEqual(schoolbook.subtract(f"1{'0' * 1000}", "1"), '9' * 1000)
+        self.assertEqual(schoolbook.subtract(f"1{'0' * 10}.00", "0.01"), f"{'9' * 10}.99")
+        self.assertEqual(schoolbook.add('9' * 1000, "1"), f"1{'0' * 1000}")
+        self.assertEqual(schoolbook.add("99.99", "0.01"), "100.00")
+
+    def test__sum_numbers(self):
+        self.assertEqual(schoolbook.sum_numbers(["9"] * 1000), "9000")
+        self.assertEqual(schoolbook.sum_numbers(["1.99", "0.01", "98"]), "100.00")
+        self.assertEqual(schoolbook.sum_numbers(iter(["1.5", "-3", "0.25"])), "-1.25")
+        self.assertEqual(schoolbook.sum_numbers(["-1", "-2"]), "-3")
+        self.assertEqual(schoolbook.multiply("0.01", "0.02"), "0.0002")
+
+    def test__divide__repeating(self):
+        self.assertEqual(schoolbook.divide("1", "7", 50), divide("1", "7", 50))
+        self.assertEqual(schoolbook.divide("-1", "3", 5), "-0.33333")
+        self.assertEqual(schoolbook.divide("1", "3", repeating=True), "0.(3)")
+        self.assertEqual(schoolbook.divide("0.5", "0.22", repeating=True), "2.(27)")
+        self.assertEqual(schoolbook.divide("1", "8", repeating=True), "0.125")
+
+    def _check_matches(self):
+        values = ["7", "96", "1000", "0.8", "0.0025", "123.456", "987.654", "-6.3", "-76.7", "22", "-1.2345"]
+        for number1 in values:
+            for number2 in values:
+                self.assertEqual(schoolbook.add(number1, number2), add(number1, number2))
+                self.assertEqual(schoolbook.multiply(number1, number2), multiply(number1, number2))
+                if number1 != number2:
+                    self.assertEqual(schoolbook.subtract(number1, number2), subtract(number1, number2))
+                if number2 != "0":
+                    self.assertEqual(schoolbook.divide(number1, number2, 12), divide(number1, number2, 12))
+
+
+
+class AsyncTests(unittest.IsolatedAsyncioTestCase):
+    async def test__same_answers(self):
+        rng = random.Random(18)
+        for _ in range(200):
+            number1 = f'{rng.choice(["", "-"])}{rng.randint(0, 10**40)}.{rng.randint(0, 10**20)}'
+            number2 = f'{rng.randint(1, 10**30)}.{rng.randint(0, 10**10)}'
+            context = Context(rng.choice([None, 7]), rng.choice([FLOOR, HALF_EVEN]))
+            self.assertEqual(await amultiply(number1, number2, context, yield_every=20), multiply(number1, number2, context))
+            self.assertEqual(
+                await adivide(number1, number2, 30, context, yield_every=20), divide(number1, number2, 30, context),
+            )
+
+        with ThreadPoolExecutor(1) as executor, local_context(precision=5):
+            self.assertEqual(await adivide("1", "7", executor=executor), "0.14285")
+            self.assertEqual(await amultiply("123.456", "2", executor=executor), "246.91")
+
+    async def test__progress_and_others_keep_running(self):
+        steps = []
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        answer = await adivide("1", "7", 20_000, yield_every=1000, progress=lambda done, total: steps.append((done, total)))
+        ticker.cancel()
+
+        self.assertEqual(answer, divide("1", "7", 20_000))
+        self.assertGreater(len(steps), 10)
+        self.assertEqual(steps[-1][0], steps[-1][1])
+        self.assertEqual(steps, sorted(steps))
+        self.assertGreaterEqual(ticks, len(steps) - 1)
+
+    async def test__timeout_and_cancel(self):
+        with self.assertRaises(TimeoutError):
+            await adivide("2", "3", 10**7, yield_every=100, timeout=0.01)
+
+        task = asyncio.create_task(amultiply("9" * 200_000, "9" * 200_000, yield_every=100))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        with self.assertRaises(ZeroDivisionError):
+            await adivide("1", "0.0")
+
+    async def test__multiply_pieces(self):
+        # big enough for Toom-3 and Karatsuba, split into pieces of a few hundred digits
+        rng = random.Random(23)
+        number1 = "".join(rng.choice("0123456789") for _ in range(3000)) + "1"
+        number2 = "".join(rng.choice("0123456789") for _ in range(1300)) + "0" * 20
+        for pair in ((number1, number2), (number1, number1), (number2, f"-{number1}")):
+            steps = []
+            answer = await amultiply(*pair, yield_every=300, progress=lambda done, total: steps.append((done, total)))
+            self.assertEqual(answer, multiply(*pair))
+            self.assertGreater(len(steps), 10)
+            self.assertEqual(steps, sorted(steps))
+            self.assertEqual(steps[-1][0], steps[-1][1])
+
+        x = Number.from_string("12")
+        self.assertEqual(await amultiply(x, Number(1, x.limbs, -1)), "14.4")
+
+
+class InstrumentTests(unittest.TestCase):
+    def test__counters(self):
+        originals = operations.add, schoolbook.subtract, utils._add_ints
+        with instrument.profile() as profile:
+            self.assertEqual(schoolbook.add("999", "1"), "1000")
+            self.assertEqual(schoolbook.subtract("1000", "1"), "999")
+            self.assertEqual(schoolbook.add("-5", "3"), "-2")  # sent on to subtract("3", "5")
+            self.assertEqual(add("1.5", "2"), "3.5")
+
+        stats = profile.stats
+        self.assertEqual(stats['schoolbook.add'].calls, 2)
+        self.assertEqual(stats['schoolbook.add'].carries, 3)
+        self.assertEqual(stats['schoolbook.subtract'].borrows, 3)  # 5 - 3 doesn't borrow
+        self.assertEqual(stats['schoolbook.subtract'].depth, 2)
+        self.assertEqual(stats['operations.add'].digits, 3)
+        self.assertGreater(stats['utils._add_ints'].calls, 0)
+        self.assertIn('schoolbook.add', profile.summary())
+
+        # the originals are back, including where they were imported by name
+        self.assertEqual((operations.add, schoolbook.subtract, utils._add_ints), originals)
+        self.assertIs(add, operations.add)
+
+    def test__trace(self):
+        with instrument.profile() as profile:
+            divide("1", "7", 100)
+            with instrument.profile() as inner:
+                multiply("12", "34")
+        self.assertEqual(list(profile.stats), ['operations.divide'])
+        self.assertEqual(list(inner.stats), ['operations.multiply'])
+
+        path = f'test_trace_{os.getpid()}.json'
+        try:
+            profile.write_trace(path)
+            with open(path) as f:
+                trace = json.load(f)
+        finally:
+            os.remove(path)
+        [event] = trace['traceEvents']
+        self.assertEqual((event['name'], event['ph']), ('operations.divide', 'X'))
+        self.assertEqual(trace['otherData']['operations.divide']['calls'], 1)
+
+
+
+class ParallelTests(unittest.TestCase):
+    def test__same_as_multiply(self):
+        threshold = parallel.PARALLEL_THRESHOLD
+        parallel.PARALLEL_THRESHOLD = 10
+        self.addCleanup(setattr, parallel, 'PARALLEL_THRESHOLD', threshold)
+
+        rng = random.Random(23)
+        numbers = [f'{rng.choice(["", "-"])}{rng.randint(1, 10**rng.randint(20, 400))}.{rng.randint(0, 999)}' for _ in range(8)]
+        with ThreadPoolExecutor(3) as executor:
+            for number1, number2 in itertools.combinations(numbers, 2):
+                for workers in (2, 3, 5):
+                    self.assertEqual(
+                        parallel.multiply_parallel(number1, number2, workers, executor=executor), multiply(number1, number2),
+                    )
+            context = Context(precision=5)
+            self.assertEqual(
+                parallel.multiply_parallel(numbers[0], numbers[1], 2, context, executor), multiply(numbers[0], numbers[1], context),
+            )
+
+        # a real process pool
+        self.assertEqual(parallel.multiply_parallel(numbers[0], numbers[1], 2), multiply(numbers[0], numbers[1]))
+
+        # too short to bother - no pool needed
+        parallel.PARALLEL_THRESHOLD = threshold
+        self.assertEqual(parallel.multiply_parallel("12", "34", 4, executor=object()), "408")
+
+
+class FilesTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = lambda name: os.path.join(directory.name, name)
+
+        # small blocks, so the numbers below span several of them
+        block_digits = files.BLOCK_DIGITS
+        files.BLOCK_DIGITS = 18
+        self.addCleanup(setattr, files, 'BLOCK_DIGITS', block_digits)
+
+    def write(self, name: str, number: str) -> str:
+        with open(self.path(name), 'w') as f:
+            f.write(f'{number}\n')
+        return self.path(name)
+
+    def read(self, name: str) -> str:
+        with open(self.path(name)) as f:
+            return f.read()
+
+    def test__same_as_operations(self):
+        rng = random.Random(20)
+        numbers = ['0', '-0.00', '999999999999999999999', '0.000000000000000000001', '-123.4500']
+        numbers += [f'{rng.choice(["", "-"])}{rng.randint(0, 10**60)}.{rng.randint(0, 10**30):030}' for _ in range(12)]
+        for number1, number2 in itertools.product(numbers, repeat=2):
+            path1, path2 = self.write('a', number1), self.write('b', number2)
+            for function, operation in ((files.add_files, add), (files.subtract_files, subtract), (files.multiply_files, multiply)):
+                function(path1, path2, self.path('out'))
+                self.assertEqual(self.read('out'), f'{operation(number1, number2)}\n')
+            if float(number2):
+                files.divide_files(path1, path2, self.path('out'), 40)
+                self.assertEqual(self.read('out'), f'{divide(number1, number2, 40)}\n')
+
+    def test__cli(self):
+        path1, path2 = self.write('a', '1'), self.write('b', '7')
+        files.main(['divide', path1, path2, self.path('out'), '--max-decimals', '50'])
+        self.assertEqual(self.read('out'), f'{divide("1", "7", 50)}\n')
+        files.main(['add', path1, path2, self.path('out'), '--precision', '1', '--rounding', 'ceiling'])
+        self.assertEqual(self.read('out'), '8\n')
+
+        with self.assertRaises(ValueError):
+            files.add_files(self.write('c', '1.2.3'), path1, self.path('out'))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,42 @@
+from contextlib import contextmanager
+
+
+# The fundamental operations below check every digit they're given, which is handy when following
+# along or debugging, but it's most of the work they do. With CHECKED off, they look the answer up
+# in a table instead, and the numbers are checked once up front (see _validate_numbers).
+CHECKED = False
+
+_DIGITS = {**{str(i): i for i in range(10)}, **{i: i for i in range(10)}}  # '7' or 7 -> 7
+_ADD_TABLE = [[i + j for j in range(10)] for i in range(10)]
+_SUBTRACT_TABLE = [[i - j for j in range(10)] for i in range(10)]
+_MULTIPLY_TABLE = [[i * j for j in range(10)] for i in range(10)]
+
+
+@contextmanager
+def checked(enabled: bool = True):
+    # with checked(): ... - validate every single digit inside the block
+    global CHECKED
+    previous, CHECKED = CHECKED, enabled
+    try:
+        yield
+    finally:
+        CHECKED = previous
+
+
+def _validate_numbers(*values: str) -> None:
+    # the check that the fast path relies on - done once per number rather than once per digit
+    if not CHECKED:
+        _check_numbers(*values)
+
+
+def _check_numbers(*values: str) -> None:
+    for value in values:
+        digits = value[1:] if value.startswith('-') else value
+        integer, _, decimal = digits.partition('.')
+        if not (integer or decimal) or not digits.isascii() or not f'{integer}{decimal}'.isdigit():
+            raise ValueError(f"Cannot interpret {value!r} as a number")
+
+
 def _validate_ints_below_10(*args) -> None:
     # The fundamental methods are only allowed to work with single-digit integers
     for i, value in enumerate(args):
@@ -9,18 +48,24 @@ def _validate_ints_below_10(*args) -> None:
 # These are the fundamental operations we can perform
 
 def _add_ints(v1: str | int, v2: str | int) -> int:
+    if not CHECKED:
+        return _ADD_TABLE[_DIGITS[v1]][_DIGITS[v2]]
     int1, int2 = int(v1), int(v2)
     _validate_ints_below_10(int1, int2)
     return int1 + int2
 
 
 def _subtract_ints(v1: str | int, v2: str | int) -> int:
+    if not CHECKED:
+        return _SUBTRACT_TABLE[_DIGITS[v1]][_DIGITS[v2]]
     int1, int2 = int(v1), int(v2)
     _validate_ints_below_10(int1, int2)
     return int1 - int2
 
 
 def _multiply_ints(v1: str | int, v2: str | int) -> int:
+    if not CHECKED:
+        return _MULTIPLY_TABLE[_DIGITS[v1]][_DIGITS[v2]]
     int1, int2 = int(v1), int(v2)
     _validate_ints_below_10(int1, int2)
     return int1 * int2
@@ -123,34 +168,61 @@ def _clean_number(number: str) -> str:
 
 def _lte(number1: str, number2: str) -> bool:
     # use string comparison for number1 <= number2
-    number1 = _clean_number(number1)
-    number2 = _clean_number(number2)
-
-    if number1 == number2:
-        return True
-    
-    if number1.startswith('-') and number2.startswith('-'):
-        # both numbers are negative, so we can compare them as if they were positive
-        return not _lte(number1[1:], number2[1:])
-    elif number1.startswith('-') and not number2.startswith('-'):
-        return True
-    elif not number1.startswith('-') and number2.startswith('-'):
-        return False
-
-    if len(number1) < len(number2):
-        return True
-    elif len(number1) > len(number2):
-        return False
-    else:
-        # same length - compare each char
-        for char1, char2 in zip(number1, number2):
-            if char1 < char2:
-                return True
-            elif char1 > char2:
-                return False
-            else:
-                # maybe unnecessary to have this block, but it makes the logic clear
-                continue
-    
-    # if we get here, something has gone wrong
-    raise ValueError(f"Cannot compare {number1} and {number2} for less than or equal to (<=)")
+    return _compare_strings(number1, number2) <= 0
+
+
+def _compare_strings(number1: str, number2: str) -> int:
+    # -1, 0 or 1 as number1 is less than, equal to or greater than number2. Works straight off the
+    # strings as given - signs, leading / trailing zeroes and all - without making cleaned copies,
+    # and stops at the first digit that settles it.
+    negative1, negative2 = number1.startswith('-'), number2.startswith('-')
+    if negative1 != negative2:
+        # opposite signs - unless they're both zero ("-0" == "0.0")
+        if _is_zero_string(number1) and _is_zero_string(number2):
+            return 0
+        return -1 if negative1 else 1
+
+    # the same sign - compare sizes, and flip the answer for negative numbers
+    comparison = _compare_magnitudes(number1, int(negative1), number2, int(negative2))
+    return -comparison if negative1 else comparison
+
+
+def _is_zero_string(number: str) -> bool:
+    return number.count('0') + number.count('.') + number.startswith('-') == len(number)
+
+
+def _compare_magnitudes(number1: str, start1: int, number2: str, start2: int) -> int:
+    # skip leading zeroes, then more integer digits means bigger
+    length1, length2 = len(number1), len(number2)
+    while start1 < length1 and number1[start1] == '0':
+        start1 += 1
+    while start2 < length2 and number2[start2] == '0':
+        start2 += 1
+    point1, point2 = number1.find('.', start1), number2.find('.', start2)
+    if point1 < 0:
+        point1 = length1
+    if point2 < 0:
+        point2 = length2
+    integer1, integer2 = point1 - start1, point2 - start2
+    if integer1 != integer2:
+        return 1 if integer1 > integer2 else -1
+
+    # the same number of integer digits - the first digit that differs decides, carrying on past
+    # the decimal point, where a missing digit counts as 0
+    for offset in range(integer1):
+        char1, char2 = number1[start1 + offset], number2[start2 + offset]
+        if char1 != char2:
+            return 1 if char1 > char2 else -1
+    for offset in range(1, max(length1 - point1, length2 - point2)):
+        char1 = number1[point1 + offset] if point1 + offset < length1 else '0'
+        char2 = number2[point2 + offset] if point2 + offset < length2 else '0'
+        if char1 != char2:
+            return 1 if char1 > char2 else -1
+    return 0
+
+
+def _bracket_period(prefix: str, period: str) -> str:
+    # start the period as early as it can: 0.3(3) is 0.(3), and 0.16(36) is 0.1(63)
+    while prefix[-1] == period[-1]:
+        prefix, period = prefix[:-1], f'{period[-1]}{period[:-1]}'
+    return f'{prefix}({period})'